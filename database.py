@@ -1,1159 +1,1655 @@
 import sqlite3
-import random
 import uuid
 import os
-from datetime import datetime
+import atexit
+import functools
+import io
+import itertools
+import logging
+import queue
+import random
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from operator import itemgetter
+from cache import TTLCache
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     POSTGRES_AVAILABLE = True
 except ImportError:
     POSTGRES_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+# PostgreSQL connection pool bounds: bot workers, the API pool, the read pool and the
+# event writer together run 25+ threads that borrow connections. DB_POOL_MIN are opened
+# at startup; returned connections are kept idle up to DB_POOL_MAX
+PG_POOL_MIN = int(os.getenv('DB_POOL_MIN', '10'))
+PG_POOL_MAX = int(os.getenv('DB_POOL_MAX', '50'))
+
+# In-memory caches for the per-update lookups (videos are immutable once uploaded)
+VIDEO_CACHE_SIZE = 4096
+VIDEO_CACHE_TTL = 3600
+# Read-mostly admin queries, cached per method and arguments
+QUERY_CACHE_SIZE = 256
+POPULAR_VIDEOS_CACHE_TTL = 30
+ANALYTICS_SUMMARY_CACHE_TTL = 10
+LISTING_CACHE_TTL = 60
+# Admin counters and lists; writes that change them invalidate explicitly
+STATS_CACHE_TTL = 30
+RECENT_ACTIVITY_CACHE_TTL = 10
+
+# Rows fetched per round-trip when streaming large result sets
+FETCH_BATCH_SIZE = 1000
+# Users per keyset page for long-running loops (broadcasts, cleanup)
+USER_PAGE_SIZE = 500
+
+# Activity and view rows are written off the request path in batches; a
+# one-second window coalesces bursts of panel clicks into a single transaction
+EVENT_FLUSH_INTERVAL = 1.0
+EVENT_BATCH_SIZE = 500
+# PostgreSQL batches at least this large go through COPY instead of INSERT
+COPY_MIN_ROWS = 10
+
+# Compiled statements kept by sqlite3 per connection
+SQLITE_STATEMENT_CACHE = 256
+
+# WAL lets readers run alongside a writer; NORMAL sync skips the fsync on every commit
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA busy_timeout=5000',
+    # Checkpoint the WAL back into the main file every ~1000 pages so it cannot grow unbounded
+    'PRAGMA wal_autocheckpoint=1000',
+]
+
+
+def _dialects(sql):
+    """Build the sqlite (?) and psycopg2 (%s) forms of a statement once"""
+    return {'sqlite': sql, 'postgresql': sql.replace('?', '%s')}
+
+
+# PostgreSQL prepared statements (name -> SQL with $n parameters), each PREPAREd on a
+# pooled connection the first time that connection executes it
+PG_PREPARED_STATEMENTS = {}
+
+
+def _prepared(name, sql):
+    """Like _dialects, but PostgreSQL runs the named server-side prepared statement"""
+    parts = sql.split('?')
+    PG_PREPARED_STATEMENTS[name] = ''.join(f'{part}${i}' for i, part in enumerate(parts[:-1], 1)) + parts[-1]
+    args = f" ({', '.join(['%s'] * (len(parts) - 1))})" if len(parts) > 1 else ''
+    return {'sqlite': sql, 'postgresql': f'EXECUTE {name}{args}'}
+
+
+# Pooled connection -> names of the PG_PREPARED_STATEMENTS already prepared on it
+_prepared_names = weakref.WeakKeyDictionary()
+_prepared_names_lock = threading.Lock()
+
+
+class _LazyPrepareMixin:
+    """Cursor mixin that PREPAREs a named statement before its connection first EXECUTEs it"""
+
+    def execute(self, query, vars=None):
+        if isinstance(query, str) and query.startswith('EXECUTE '):
+            name = query.split()[1]
+            with _prepared_names_lock:
+                names = _prepared_names.setdefault(self.connection, set())
+            if name not in names:
+                super().execute(f'PREPARE {name} AS {PG_PREPARED_STATEMENTS[name]}')
+                names.add(name)
+        return super().execute(query, vars)
+
+
+if POSTGRES_AVAILABLE:
+    class _PreparingCursor(_LazyPrepareMixin, psycopg2.extensions.cursor):
+        pass
+
+    class _PreparingDictCursor(_LazyPrepareMixin, RealDictCursor):
+        pass
+
+    class _KeepOpenPool(ThreadedConnectionPool):
+        """Connection pool that opens minconn eagerly but keeps up to keepconn idle on return"""
+
+        def __init__(self, minconn, maxconn, keepconn, *args, **kwargs):
+            super().__init__(minconn, maxconn, *args, **kwargs)
+            self.keepconn = keepconn
+
+        def _putconn(self, conn, key=None, close=False):
+            # The base class closes a returned connection once minconn are idle;
+            # putconn() holds the pool lock, so swapping the bound in is safe
+            minconn, self.minconn = self.minconn, self.keepconn
+            try:
+                super()._putconn(conn, key, close)
+            finally:
+                self.minconn = minconn
+
+
+# Hot-path statements are constants so the SQL text (the statement cache key) never changes
+_UPSERT_USER = '''
+    INSERT INTO users (user_id, username, first_name) VALUES (?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET last_activity = CURRENT_TIMESTAMP,
+    username = COALESCE(excluded.username, users.username),
+    first_name = COALESCE(excluded.first_name, users.first_name)
+'''
+ADD_USER_SQL = _dialects(_UPSERT_USER)
+REMOVE_USER_SQL = _dialects('DELETE FROM users WHERE user_id = ?')
+REMOVE_USERS_BULK_PG_SQL = 'DELETE FROM users WHERE user_id = ANY(%s)'
+GET_VIDEO_BY_ID_SQL = _prepared('get_video_by_id', 'SELECT id, file_id, name, description FROM videos WHERE id = ?')
+DELETE_VIDEO_SQL = _dialects('DELETE FROM videos WHERE id = ?')
+UNBAN_USER_SQL = _dialects('DELETE FROM banned_users WHERE user_id = ?')
+BANNED_USER_IDS_SQL = _dialects('SELECT user_id FROM banned_users')
+# Bump when migrate_schema gains a step; databases at this version skip the probe
+SCHEMA_VERSION = 3
+SET_SCHEMA_VERSION_SQL = _dialects('INSERT INTO _schema_version (v) VALUES (?)')
+
+# ban_user is an optimistic compare-and-swap on banned_users.version instead of a locking upsert
+BAN_CAS_RETRIES = 5
+GET_BAN_VERSION_SQL = _dialects('SELECT version FROM banned_users WHERE user_id = ?')
+CAS_BAN_SQL = _dialects('''
+    UPDATE banned_users SET banned_by = ?, reason = ?, banned_at = CURRENT_TIMESTAMP, version = version + 1
+    WHERE user_id = ? AND version = ?
+''')
+INSERT_BAN_SQL = _dialects('INSERT INTO banned_users (user_id, banned_by, reason) VALUES (?, ?, ?) ON CONFLICT (user_id) DO NOTHING')
+# Append-only event tables fed by the background writer: kind -> (table, columns)
+EVENT_TABLES = {
+    'activity': ('user_activity', ('user_id', 'action', 'details', 'timestamp')),
+    'view': ('video_analytics', ('video_id', 'user_id', 'action', 'timestamp')),
+}
+INSERT_EVENT_SQL = {
+    kind: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for kind, (table, columns) in EVENT_TABLES.items()
+}
+# Served by idx_videos_created_at as an index scan + LIMIT on both backends
+RECENT_VIDEOS_SQL = _dialects('SELECT id, name, description FROM videos ORDER BY created_at DESC LIMIT ?')
+# Newest first, with id as a tiebreaker so pages are stable
+VIDEOS_PAGE_SQL = _dialects('SELECT id, name FROM videos ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?')
+# Every scalar the admin dashboards show, in one round-trip
+DASHBOARD_COUNTS_SQL = '''
+    SELECT (SELECT COUNT(*) FROM users) AS users,
+           (SELECT COUNT(*) FROM videos) AS videos,
+           (SELECT COUNT(*) FROM videos WHERE description != '') AS videos_with_description
+'''
+ADD_VIDEO_SQL = _dialects('INSERT INTO videos (id, file_id, name, description) VALUES (?, ?, ?, ?)')
+RECENT_ACTIVITY_SQL = _dialects('''
+    SELECT a.user_id, u.username, u.first_name, a.action, 
+           a.details, a.timestamp 
+    FROM user_activity a
+    LEFT JOIN users u ON a.user_id = u.user_id
+    ORDER BY a.timestamp DESC 
+    LIMIT ?
+''')
+# Ban status comes back with each row so result lists need no per-user lookups
+_SEARCH_USERS_TEMPLATE = '''
+    SELECT u.user_id, u.username, u.first_name, u.joined_at, u.last_activity,
+           EXISTS (SELECT 1 FROM banned_users b WHERE b.user_id = u.user_id) AS is_banned
+    FROM users u
+    WHERE u.username {like} ? OR u.first_name {like} ? OR CAST(u.user_id AS TEXT) {like} ?
+    ORDER BY u.last_activity DESC
+'''
+SEARCH_USERS_SQL = {
+    'sqlite': _SEARCH_USERS_TEMPLATE.format(like='LIKE'),
+    'postgresql': _SEARCH_USERS_TEMPLATE.format(like='ILIKE').replace('?', '%s'),
+}
+USER_ACTIVITY_SQL = _dialects('''
+    SELECT action, details, timestamp 
+    FROM user_activity 
+    WHERE user_id = ? 
+    ORDER BY timestamp DESC 
+    LIMIT ?
+''')
+VIDEO_ANALYTICS_SQL = _prepared('get_video_analytics', '''
+    SELECT COUNT(*) as total_views,
+           COUNT(DISTINCT user_id) as unique_viewers,
+           MIN(timestamp) as first_view,
+           MAX(timestamp) as last_view
+    FROM video_analytics 
+    WHERE video_id = ? AND action = 'view'
+''')
+# Totals in one pass over the views, joined to the most viewed video (if any)
+_ANALYTICS_SUMMARY_TEMPLATE = '''
+    SELECT s.total_views, s.views_today, t.name AS top_name, t.views AS top_views
+    FROM (
+        SELECT COUNT(*) AS total_views,
+               COUNT(CASE WHEN DATE(timestamp) = {today} THEN 1 END) AS views_today
+        FROM video_analytics WHERE action = 'view'
+    ) s
+    LEFT JOIN (
+        SELECT v.name, c.views
+        FROM video_view_counts c
+        JOIN videos v ON v.id = c.video_id
+        ORDER BY c.views DESC
+        LIMIT 1
+    ) t ON 1 = 1
+'''
+ANALYTICS_SUMMARY_SQL = {
+    'sqlite': _ANALYTICS_SUMMARY_TEMPLATE.format(today="DATE('now')"),
+    'postgresql': _ANALYTICS_SUMMARY_TEMPLATE.format(today='CURRENT_DATE'),
+}
+# video_view_counts is maintained by the background writer, so ranking is an index walk
+POPULAR_VIDEOS_SQL = _dialects('''
+    SELECT v.id, v.name, c.views as view_count
+    FROM video_view_counts c
+    JOIN videos v ON v.id = c.video_id
+    ORDER BY c.views DESC
+    LIMIT ?
+''')
+ADD_VIEW_COUNTS_SQL = _dialects('''
+    INSERT INTO video_view_counts (video_id, views) VALUES (?, ?)
+    ON CONFLICT (video_id) DO UPDATE SET views = video_view_counts.views + excluded.views
+''')
+DELETE_VIEW_COUNT_SQL = _dialects('DELETE FROM video_view_counts WHERE video_id = ?')
+GET_TEMPLATE_SQL = _prepared('get_template_by_name', '''
+    SELECT id, name, content, created_by, created_at
+    FROM message_templates
+    WHERE name = ?
+''')
+# {values} is a single (?, ?, ?) row, or %s for execute_values batches
+_TEMPLATE_UPSERT = '''
+    INSERT INTO message_templates (name, content, created_by)
+    VALUES {values} ON CONFLICT (name) DO UPDATE SET
+    content = excluded.content, created_by = excluded.created_by, created_at = CURRENT_TIMESTAMP
+'''
+UPSERT_TEMPLATE_SQL = _dialects(_TEMPLATE_UPSERT.format(values='(?, ?, ?)'))
+BULK_UPSERT_TEMPLATES_SQL = _TEMPLATE_UPSERT.format(values='%s')
+DELETE_TEMPLATE_SQL = _dialects('DELETE FROM message_templates WHERE name = ?')
+ADD_BROADCAST_SQL = _dialects('''
+    INSERT INTO scheduled_broadcasts 
+    (admin_id, target_channel, content_type, content, media_file_id, scheduled_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+''')
+_PENDING_BROADCASTS_TEMPLATE = '''
+    SELECT id, admin_id, target_channel, content_type, content, media_file_id, scheduled_time
+    FROM scheduled_broadcasts 
+    WHERE status = 'pending' AND scheduled_time <= {now}
+    ORDER BY scheduled_time ASC
+'''
+PENDING_BROADCASTS_SQL = {
+    'sqlite': _PENDING_BROADCASTS_TEMPLATE.format(now="datetime('now')"),
+    'postgresql': _PENDING_BROADCASTS_TEMPLATE.format(now='CURRENT_TIMESTAMP'),
+}
+UPDATE_BROADCAST_STATUS_SQL = _dialects('UPDATE scheduled_broadcasts SET status = ? WHERE id = ?')
+_BROADCAST_COLUMNS = '''
+    SELECT id, admin_id, target_channel, content_type, content, 
+           media_file_id, scheduled_time, status, created_at
+    FROM scheduled_broadcasts 
+'''
+NEXT_BROADCAST_DELAY_SQL = {
+    'sqlite': '''
+        SELECT (julianday(MIN(scheduled_time)) - julianday('now')) * 86400
+        FROM scheduled_broadcasts WHERE status = 'pending'
+    ''',
+    'postgresql': '''
+        SELECT EXTRACT(EPOCH FROM (MIN(scheduled_time) - CURRENT_TIMESTAMP))
+        FROM scheduled_broadcasts WHERE status = 'pending'
+    ''',
+}
+ADMIN_BROADCASTS_SQL = _dialects(_BROADCAST_COLUMNS + 'WHERE admin_id = ? ORDER BY scheduled_time DESC LIMIT ?')
+ALL_BROADCASTS_SQL = _dialects(_BROADCAST_COLUMNS + 'ORDER BY scheduled_time DESC LIMIT ?')
+BROADCAST_COUNTS_SQL = _dialects('''
+    SELECT COUNT(*) AS total, COUNT(CASE WHEN status = 'pending' THEN 1 END) AS pending
+    FROM scheduled_broadcasts WHERE admin_id = ?
+''')
+GET_CATEGORY_SQL = _prepared('get_category_by_name', '''
+    SELECT id, name, description, color, created_by, created_at
+    FROM categories
+    WHERE name = ?
+''')
+ADD_CATEGORY_SQL = {
+    'sqlite': '''
+        INSERT OR REPLACE INTO categories (name, description, color, created_by)
+        VALUES (?, ?, ?, ?)
+    ''',
+    'postgresql': '''
+        INSERT INTO categories (name, description, color, created_by)
+        VALUES (%s, %s, %s, %s) ON CONFLICT (name) DO UPDATE SET
+        description = EXCLUDED.description, color = EXCLUDED.color, created_by = EXCLUDED.created_by
+    ''',
+}
+DELETE_CATEGORY_SQL = _dialects('DELETE FROM categories WHERE id = ?')
+VIDEO_CATEGORIES_SQL = _dialects('''
+    SELECT c.id, c.name, c.description, c.color, vc.assigned_by, vc.assigned_at
+    FROM categories c
+    JOIN video_categories vc ON c.id = vc.category_id
+    WHERE vc.video_id = ?
+    ORDER BY c.name
+''')
+# Columns callers may project from videos; listings only need id and name
+VIDEO_LISTING_FIELDS = ('id', 'file_id', 'name', 'description', 'created_at')
+_VIDEOS_BY_CATEGORY_TEMPLATE = '''
+    SELECT {columns}
+    FROM videos v
+    JOIN video_categories vc ON v.id = vc.video_id
+    WHERE vc.category_id = ?
+    ORDER BY v.name
+'''
+_ASSIGN_CATEGORY_TEMPLATE = '''
+    INSERT INTO video_categories (video_id, category_id, assigned_by)
+    VALUES {values} ON CONFLICT (video_id, category_id) DO UPDATE SET
+    assigned_by = excluded.assigned_by, assigned_at = CURRENT_TIMESTAMP
+'''
+ASSIGN_CATEGORY_SQL = _dialects(_ASSIGN_CATEGORY_TEMPLATE.format(values='(?, ?, ?)'))
+BULK_ASSIGN_CATEGORIES_SQL = _ASSIGN_CATEGORY_TEMPLATE.format(values='%s')
+REMOVE_VIDEO_CATEGORY_SQL = _dialects('DELETE FROM video_categories WHERE video_id = ? AND category_id = ?')
+# Keyset pagination over (joined_at, user_id), keyed by (active_only, has_cursor)
+_USERS_SELECT = '''
+    SELECT u.user_id, u.username, u.first_name, u.joined_at, u.last_activity
+    FROM users u
+'''
+_ACTIVE_USERS_SELECT = _USERS_SELECT + 'LEFT JOIN banned_users b ON u.user_id = b.user_id WHERE b.user_id IS NULL '
+_USERS_PAGE_ORDER = ' ORDER BY u.joined_at DESC, u.user_id DESC LIMIT ?'
+USERS_PAGE_SQL = {
+    (False, False): _dialects(_USERS_SELECT + _USERS_PAGE_ORDER),
+    (False, True): _dialects(_USERS_SELECT + 'WHERE (u.joined_at, u.user_id) < (?, ?)' + _USERS_PAGE_ORDER),
+    (True, False): _dialects(_ACTIVE_USERS_SELECT + _USERS_PAGE_ORDER),
+    (True, True): _dialects(_ACTIVE_USERS_SELECT + 'AND (u.joined_at, u.user_id) < (?, ?)' + _USERS_PAGE_ORDER),
+}
+# Random picks choose from the cached id list instead of ORDER BY RANDOM() scanning the table
+VIDEO_IDS_SQL = 'SELECT id FROM videos'
+
+# Same syntax in SQLite and PostgreSQL
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_activity_user_ts ON user_activity (user_id, timestamp DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_activity_ts ON user_activity (timestamp DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users (last_activity DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_users_joined_at ON users (joined_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos (created_at DESC)',
+    # (action, video_id, timestamp) covers the view-filtered GROUP BY and summary counts
+    'CREATE INDEX IF NOT EXISTS idx_va_action_video ON video_analytics (action, video_id, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_va_video_action ON video_analytics (video_id, action)',
+    'CREATE INDEX IF NOT EXISTS idx_vc_category_video ON video_categories (category_id, video_id)',
+    'CREATE INDEX IF NOT EXISTS idx_vvc_views ON video_view_counts (views DESC)',
+    # Partial index: only pending rows are ever polled, so the index stays tiny
+    "CREATE INDEX IF NOT EXISTS idx_sb_pending ON scheduled_broadcasts (scheduled_time) WHERE status = 'pending'",
+    # Superseded by the composite indexes above
+    'DROP INDEX IF EXISTS idx_analytics_video',
+    'DROP INDEX IF EXISTS idx_video_categories_category',
+]
+
+# Full-text search: FTS5 mirror of videos on SQLite (M* keeps Devanagari vowel signs
+# inside words), trigram GIN indexes that let ILIKE '%q%' use an index on PostgreSQL
+SQLITE_FTS_SCHEMA = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+        name, description, content='videos', content_rowid='rowid',
+        tokenize="unicode61 categories 'L* N* Co M*'")''',
+    '''CREATE TRIGGER IF NOT EXISTS videos_fts_ai AFTER INSERT ON videos BEGIN
+        INSERT INTO videos_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS videos_fts_ad AFTER DELETE ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS videos_fts_au AFTER UPDATE ON videos BEGIN
+        INSERT INTO videos_fts (videos_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO videos_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END''',
+]
+PG_TRGM_SCHEMA = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS idx_videos_name_trgm ON videos USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_videos_description_trgm ON videos USING gin (description gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS idx_users_first_name_trgm ON users USING gin (first_name gin_trgm_ops)',
+]
+SEARCH_VIDEOS_FTS_SQL = '''
+    SELECT v.id, v.file_id, v.name, v.description
+    FROM videos_fts f JOIN videos v ON v.rowid = f.rowid
+    WHERE videos_fts MATCH ?
+    ORDER BY f.rank
+'''
+
+
+# Row key extractors for batch grouping and de-duplication
+_first_column = itemgetter(0)
+_first_two_columns = itemgetter(0, 1)
+
+
+@functools.lru_cache(maxsize=None)
+def _videos_by_category_sql(fields):
+    """Build the per-dialect category listing query for an allow-listed field tuple"""
+    unknown = set(fields) - set(VIDEO_LISTING_FIELDS)
+    if not fields or unknown:
+        raise ValueError(f"Unsupported video fields: {', '.join(sorted(unknown)) or 'none given'}")
+    return _dialects(_VIDEOS_BY_CATEGORY_TEMPLATE.format(columns=', '.join(f'v.{f}' for f in fields)))
+
+
+def _utc_timestamp():
+    """Current UTC time in the same format as CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _is_uuid(value):
+    """True if value parses as a UUID (PostgreSQL rejects anything else for UUID columns)"""
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def _fts_query(query):
+    """Turn free text into an FTS5 query that prefix-matches every word"""
+    words = [w for w in query.split() if any(ch.isalnum() for ch in w)]
+    return ' '.join('"' + w.replace('"', '""') + '"*' for w in words)
+
+
+def cached_query(ttl):
+    """Cache a Database method's result in self._query_cache, keyed on its name and arguments"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            value = self._query_cache.get(key)
+            if value is None:
+                value = method(self, *args, **kwargs)
+                self._query_cache.set(key, value, ttl)
+            return value
+        return wrapper
+    return decorator
+
+
 class Database:
     def __init__(self):
         # Check if DATABASE_URL is set (Render PostgreSQL)
         self.database_url = os.getenv('DATABASE_URL')
-        
+        self._video_cache = TTLCache(VIDEO_CACHE_SIZE, VIDEO_CACHE_TTL)
+        self._query_cache = TTLCache(QUERY_CACHE_SIZE)
+        self._broadcast_scheduled = threading.Event()
+        # PostgreSQL connection pinned to a thread by connection(), reused by cursor()
+        self._pinned = threading.local()
+        # Bumped on every catalogue change so callers can key their own caches on it
+        self._video_versions = itertools.count(1)
+        self.videos_version = 0
+
         if self.database_url and POSTGRES_AVAILABLE:
-            print("📊 Using PostgreSQL database")
+            logger.info("📊 Using PostgreSQL database (pooled)")
             self.db_type = 'postgresql'
-            self.conn = psycopg2.connect(self.database_url)
-            self.conn.autocommit = True
+            # PG_POOL_MIN connections open at startup; every connection made under load
+            # (up to PG_POOL_MAX) stays open for reuse instead of reconnecting per query
+            self.pool = _KeepOpenPool(PG_POOL_MIN, PG_POOL_MAX, PG_POOL_MAX, self.database_url)
         else:
-            print("📊 Using SQLite database (local)")
+            logger.info("📊 Using SQLite database (local)")
             self.db_type = 'sqlite'
-            self.conn = sqlite3.connect('videos.db', check_same_thread=False)
-        
+            # One connection per thread so handlers read concurrently under WAL
+            self._local = threading.local()
+
         self.create_tables()
+        # Every ban goes through this process, so the set stays authoritative after the initial load
+        self._banned_ids = self.get_banned_user_ids()
+        self._start_event_writer()
+
+    @property
+    def conn(self):
+        """The calling thread's SQLite connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect_sqlite()
+        return conn
+
+    def _connect_sqlite(self):
+        """Open the local database in autocommit mode with WAL and tuned PRAGMAs"""
+        conn = sqlite3.connect('videos.db', check_same_thread=False,
+                               cached_statements=SQLITE_STATEMENT_CACHE,
+                               isolation_level=None)
+        # sqlite3.Row is built in C and maps column names once per cursor,
+        # so rows convert with dict(row) on both backends
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
 
-    def get_cursor(self):
-        """Get appropriate cursor based on database type"""
+    @contextmanager
+    def cursor(self, transaction=False, dict_rows=True):
+        """Yield a cursor; on PostgreSQL a connection is borrowed from the pool
+        (or the one pinned to this thread by connection()).
+
+        With transaction=True the whole block commits once at the end and
+        rolls back if it raises. dict_rows=False gives a plain tuple cursor
+        on PostgreSQL for scalar reads.
+        """
         if self.db_type == 'postgresql':
-            return self.conn.cursor(cursor_factory=RealDictCursor)
+            pinned = getattr(self._pinned, 'conn', None)
+            conn = pinned or self.pool.getconn()
+            try:
+                conn.autocommit = not transaction
+                cursor = conn.cursor(cursor_factory=_PreparingDictCursor if dict_rows else _PreparingCursor)
+                try:
+                    yield cursor
+                    if transaction:
+                        conn.commit()
+                except Exception:
+                    if transaction:
+                        conn.rollback()
+                    raise
+            finally:
+                if pinned is None:
+                    self.pool.putconn(conn)
         else:
-            return self.conn.cursor()
+            cursor = self.conn.cursor()
+            if transaction:
+                cursor.execute('BEGIN')
+            try:
+                yield cursor
+                if transaction:
+                    self.conn.commit()
+            except Exception:
+                if transaction:
+                    self.conn.rollback()
+                raise
+
+    @contextmanager
+    def connection(self):
+        """Borrow one pooled connection for the block so every query in it reuses the same one.
+
+        SQLite connections are already per-thread, so this only matters on
+        PostgreSQL. Nested blocks share the outer connection.
+        """
+        if self.db_type != 'postgresql' or getattr(self._pinned, 'conn', None) is not None:
+            yield
+            return
+        conn = self.pool.getconn()
+        self._pinned.conn = conn
+        try:
+            yield
+        finally:
+            self._pinned.conn = None
+            self.pool.putconn(conn)
+
+    def _fetch_value(self, sql, params=()):
+        """Return the first column of the first row, or None if there is no row"""
+        if self.db_type == 'sqlite':
+            row = self.conn.execute(sql, params).fetchone()
+        else:
+            with self.cursor(dict_rows=False) as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+        return row[0] if row is not None else None
 
     def commit(self):
         """Commit transaction if needed"""
-        if self.db_type == 'sqlite':
+        if self.db_type == 'sqlite' and self.conn.in_transaction:
             self.conn.commit()
-        # PostgreSQL uses autocommit
+        # PostgreSQL uses autocommit, SQLite runs in autocommit mode outside cursor(transaction=True)
 
     def create_tables(self):
-        """Create all necessary tables if they don't exist"""
-        cursor = self.get_cursor()
+        """Create, migrate and index all tables in a single transaction"""
+        with self.cursor(transaction=True) as cursor:
         
-        if self.db_type == 'postgresql':
-            # PostgreSQL table creation
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS videos (
-                    id TEXT PRIMARY KEY,
-                    file_id TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id BIGINT PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS banned_users (
-                    user_id BIGINT PRIMARY KEY,
-                    banned_by BIGINT,
-                    banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    reason TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_activity (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT,
-                    action TEXT,
-                    details TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS video_analytics (
-                    id SERIAL PRIMARY KEY,
-                    video_id TEXT,
-                    user_id BIGINT,
-                    action TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (video_id) REFERENCES videos (id),
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
-                    id SERIAL PRIMARY KEY,
-                    admin_id BIGINT,
-                    target_channel TEXT,
-                    content_type TEXT,
-                    content TEXT,
-                    media_file_id TEXT,
-                    scheduled_time TIMESTAMP,
-                    status TEXT DEFAULT 'pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (admin_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS message_templates (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE,
-                    content TEXT,
-                    created_by BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS categories (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT UNIQUE NOT NULL,
-                    description TEXT,
-                    color TEXT DEFAULT '#007ACC',
-                    created_by BIGINT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS video_categories (
-                    id SERIAL PRIMARY KEY,
-                    video_id TEXT NOT NULL,
-                    category_id INTEGER NOT NULL,
-                    assigned_by BIGINT,
-                    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE,
-                    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
-                    FOREIGN KEY (assigned_by) REFERENCES users (user_id),
-                    UNIQUE(video_id, category_id)
-                )
-            ''')
-        else:
-            # SQLite table creation (original)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS videos (
-                    id TEXT PRIMARY KEY,
-                    file_id TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS banned_users (
-                    user_id INTEGER PRIMARY KEY,
-                    banned_by INTEGER,
-                    banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    reason TEXT,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_activity (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    action TEXT,
-                    details TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS video_analytics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    video_id TEXT,
-                    user_id INTEGER,
-                    action TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (video_id) REFERENCES videos (id),
-                    FOREIGN KEY (user_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    admin_id INTEGER,
-                    target_channel TEXT,
-                    content_type TEXT,
-                    content TEXT,
-                    media_file_id TEXT,
-                    scheduled_time TIMESTAMP,
-                    status TEXT DEFAULT 'pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (admin_id) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS message_templates (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE,
-                    content TEXT,
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL,
-                    description TEXT,
-                    color TEXT DEFAULT '#007ACC',
-                    created_by INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (created_by) REFERENCES users (user_id)
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS video_categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    video_id TEXT NOT NULL,
-                    category_id INTEGER NOT NULL,
-                    assigned_by INTEGER,
-                    assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE,
-                    FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
-                    FOREIGN KEY (assigned_by) REFERENCES users (user_id),
-                    UNIQUE(video_id, category_id)
-                )
-            ''')
-        
-        # Migrate existing tables if needed
-        self.migrate_users_table()
-        self.migrate_categories_system()
-        self.commit()
-
-    def migrate_users_table(self):
-        """Migrate existing users table to include new columns"""
-        cursor = self.get_cursor()
-        try:
-            if self.db_type == 'sqlite':
-                # Check if username column exists
-                cursor.execute("PRAGMA table_info(users)")
-                columns = [column[1] for column in cursor.fetchall()]
-                
-                if 'username' not in columns:
-                    cursor.execute('ALTER TABLE users ADD COLUMN username TEXT')
-                    print("✅ Added username column to users table")
-                
-                if 'first_name' not in columns:
-                    cursor.execute('ALTER TABLE users ADD COLUMN first_name TEXT')
-                    print("✅ Added first_name column to users table")
-                
-                if 'joined_at' not in columns:
-                    cursor.execute('ALTER TABLE users ADD COLUMN joined_at TIMESTAMP')
-                    cursor.execute("UPDATE users SET joined_at = datetime('now') WHERE joined_at IS NULL")
-                    print("✅ Added joined_at column to users table")
-                
-                if 'last_activity' not in columns:
-                    cursor.execute('ALTER TABLE users ADD COLUMN last_activity TIMESTAMP')
-                    cursor.execute("UPDATE users SET last_activity = datetime('now') WHERE last_activity IS NULL")
-                    print("✅ Added last_activity column to users table")
+            if self.db_type == 'postgresql':
+                # PostgreSQL table creation
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS videos (
+                        id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                        file_id TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        description TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        user_id BIGINT PRIMARY KEY,
+                        username TEXT,
+                        first_name TEXT,
+                        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS banned_users (
+                        user_id BIGINT PRIMARY KEY,
+                        banned_by BIGINT,
+                        banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        reason TEXT,
+                        version INTEGER DEFAULT 0,
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS user_activity (
+                        id SERIAL PRIMARY KEY,
+                        user_id BIGINT,
+                        action TEXT,
+                        details TEXT,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS video_analytics (
+                        id SERIAL PRIMARY KEY,
+                        video_id UUID,
+                        user_id BIGINT,
+                        action TEXT,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (video_id) REFERENCES videos (id),
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
+                        id SERIAL PRIMARY KEY,
+                        admin_id BIGINT,
+                        target_channel TEXT,
+                        content_type TEXT,
+                        content TEXT,
+                        media_file_id TEXT,
+                        scheduled_time TIMESTAMP,
+                        status TEXT DEFAULT 'pending',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (admin_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS message_templates (
+                        id SERIAL PRIMARY KEY,
+                        name TEXT UNIQUE,
+                        content TEXT,
+                        created_by BIGINT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (created_by) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS categories (
+                        id SERIAL PRIMARY KEY,
+                        name TEXT UNIQUE NOT NULL,
+                        description TEXT,
+                        color TEXT DEFAULT '#007ACC',
+                        created_by BIGINT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (created_by) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS video_categories (
+                        id SERIAL PRIMARY KEY,
+                        video_id UUID NOT NULL,
+                        category_id INTEGER NOT NULL,
+                        assigned_by BIGINT,
+                        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE,
+                        FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
+                        FOREIGN KEY (assigned_by) REFERENCES users (user_id),
+                        UNIQUE(video_id, category_id)
+                    )
+                ''')
+                # Match videos.id, which is UUID on new databases and TEXT on older ones
+                cursor.execute('''
+                    SELECT data_type FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = 'videos' AND column_name = 'id'
+                ''')
+                video_id_type = 'UUID' if cursor.fetchone()['data_type'] == 'uuid' else 'TEXT'
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS video_view_counts (
+                        video_id {video_id_type} PRIMARY KEY,
+                        views BIGINT NOT NULL DEFAULT 0
+                    )
+                ''')
             else:
-                # PostgreSQL migration logic would go here if needed
-                print("✅ PostgreSQL migration completed")
-                
-        except Exception as e:
-            print(f"⚠️ Database migration warning: {e}")
+                # SQLite table creation (original)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS videos (
+                        id TEXT PRIMARY KEY,
+                        file_id TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        description TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS users (
+                        user_id INTEGER PRIMARY KEY,
+                        username TEXT,
+                        first_name TEXT,
+                        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS banned_users (
+                        user_id INTEGER PRIMARY KEY,
+                        banned_by INTEGER,
+                        banned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        reason TEXT,
+                        version INTEGER DEFAULT 0,
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS user_activity (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id INTEGER,
+                        action TEXT,
+                        details TEXT,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS video_analytics (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        video_id TEXT,
+                        user_id INTEGER,
+                        action TEXT,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (video_id) REFERENCES videos (id),
+                        FOREIGN KEY (user_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS scheduled_broadcasts (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        admin_id INTEGER,
+                        target_channel TEXT,
+                        content_type TEXT,
+                        content TEXT,
+                        media_file_id TEXT,
+                        scheduled_time TIMESTAMP,
+                        status TEXT DEFAULT 'pending',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (admin_id) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS message_templates (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT UNIQUE,
+                        content TEXT,
+                        created_by INTEGER,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (created_by) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS categories (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT UNIQUE NOT NULL,
+                        description TEXT,
+                        color TEXT DEFAULT '#007ACC',
+                        created_by INTEGER,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (created_by) REFERENCES users (user_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS video_categories (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        video_id TEXT NOT NULL,
+                        category_id INTEGER NOT NULL,
+                        assigned_by INTEGER,
+                        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        FOREIGN KEY (video_id) REFERENCES videos (id) ON DELETE CASCADE,
+                        FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE CASCADE,
+                        FOREIGN KEY (assigned_by) REFERENCES users (user_id),
+                        UNIQUE(video_id, category_id)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS video_view_counts (
+                        video_id TEXT PRIMARY KEY,
+                        views INTEGER NOT NULL DEFAULT 0
+                    )
+                ''')
 
-    def migrate_categories_system(self):
-        """Migrate existing database to include categories system"""
-        cursor = self.get_cursor()
+            # Migrate existing tables if needed (before indexing columns they may lack)
+            self.migrate_schema(cursor)
+
+            # Indexes for the hot lookup, join and ORDER BY ... LIMIT paths
+            for index_sql in INDEXES:
+                cursor.execute(index_sql)
+
+        # Kept out of the transaction: CREATE EXTENSION may be refused on PostgreSQL
+        self.create_search_indexes()
+
+    def create_search_indexes(self):
+        """Create the FTS5 table (SQLite) or trigram indexes (PostgreSQL) used by search"""
+        with self.cursor() as cursor:
+            try:
+                if self.db_type == 'sqlite':
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'videos_fts'")
+                    needs_rebuild = cursor.fetchone() is None
+                    for statement in SQLITE_FTS_SCHEMA:
+                        cursor.execute(statement)
+                    if not needs_rebuild:
+                        # The index is keyed on videos' implicit rowid, which VACUUM may
+                        # renumber; rank = 1 checks the index against the videos table
+                        try:
+                            cursor.execute("INSERT INTO videos_fts (videos_fts, rank) VALUES ('integrity-check', 1)")
+                        except sqlite3.DatabaseError:
+                            needs_rebuild = True
+                    if needs_rebuild:
+                        cursor.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+                        logger.info("✅ Built full-text search index for videos")
+                else:
+                    for statement in PG_TRGM_SCHEMA:
+                        cursor.execute(statement)
+            except Exception as e:
+                logger.warning(f"⚠️ Search index warning: {e}")
+
+    def migrate_schema(self, cursor):
+        """Bring older databases up to SCHEMA_VERSION with a single metadata probe"""
+        cursor.execute('CREATE TABLE IF NOT EXISTS _schema_version (v INTEGER)')
+        cursor.execute('SELECT MAX(v) AS v FROM _schema_version')
+        if (cursor.fetchone()['v'] or 0) >= SCHEMA_VERSION:
+            return
+        # A savepoint lets a failed migration roll back without aborting create_tables
+        cursor.execute('SAVEPOINT migrate_schema')
         try:
-            if self.db_type == 'sqlite':
-                # Check if categories table exists
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='categories'")
-                if not cursor.fetchone():
-                    print("✅ Categories system tables will be created")
-                    return
-            else:
-                # PostgreSQL check
-                cursor.execute("SELECT tablename FROM pg_tables WHERE tablename='categories'")
-                if not cursor.fetchone():
-                    print("✅ Categories system tables will be created")
-                    return
-            
-            print("✅ Categories system migration completed")
-            
+            columns = self._table_columns(cursor, ('users', 'banned_users'))
+            self.migrate_users_table(cursor, columns['users'])
+            self.migrate_banned_users_table(cursor, columns['banned_users'])
+            self.migrate_view_counts(cursor)
+            cursor.execute(SET_SCHEMA_VERSION_SQL[self.db_type], (SCHEMA_VERSION,))
+            cursor.execute('RELEASE SAVEPOINT migrate_schema')
         except Exception as e:
-            print(f"⚠️ Categories migration warning: {e}")
+            cursor.execute('ROLLBACK TO SAVEPOINT migrate_schema')
+            logger.warning(f"⚠️ Database migration warning: {e}")
 
-    def add_user(self, user_id, username=None, first_name=None):
-        """Add a user to the database if they don't exist"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO users (user_id, username, first_name) 
-                VALUES (%s, %s, %s) ON CONFLICT (user_id) DO NOTHING
-            ''', (user_id, username, first_name))
-            # Update last activity for existing users
-            cursor.execute('''
-                UPDATE users SET last_activity = CURRENT_TIMESTAMP, 
-                username = COALESCE(%s, username), 
-                first_name = COALESCE(%s, first_name) 
-                WHERE user_id = %s
-            ''', (username, first_name, user_id))
+    def migrate_view_counts(self, cursor):
+        """Backfill video_view_counts from the view log recorded before it existed"""
+        cursor.execute('DELETE FROM video_view_counts')
+        cursor.execute('''
+            INSERT INTO video_view_counts (video_id, views)
+            SELECT video_id, COUNT(*) FROM video_analytics
+            WHERE action = 'view' AND video_id IS NOT NULL
+            GROUP BY video_id
+        ''')
+
+    def _table_columns(self, cursor, tables):
+        """Map each table name to its set of column names in one query"""
+        columns = {table: set() for table in tables}
+        if self.db_type == 'sqlite':
+            marks = ', '.join('?' * len(tables))
+            cursor.execute(f'''
+                SELECT m.name AS table_name, p.name AS column_name
+                FROM sqlite_master m JOIN pragma_table_info(m.name) p
+                WHERE m.type = 'table' AND m.name IN ({marks})
+            ''', tuple(tables))
         else:
             cursor.execute('''
-                INSERT OR IGNORE INTO users (user_id, username, first_name) 
-                VALUES (?, ?, ?)
-            ''', (user_id, username, first_name))
-            # Update last activity for existing users
-            cursor.execute('''
-                UPDATE users SET last_activity = CURRENT_TIMESTAMP, 
-                username = COALESCE(?, username), 
-                first_name = COALESCE(?, first_name) 
-                WHERE user_id = ?
-            ''', (username, first_name, user_id))
-        self.commit()
+                SELECT table_name, column_name FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = ANY(%s)
+            ''', (list(tables),))
+        for row in cursor.fetchall():
+            columns[row['table_name']].add(row['column_name'])
+        return columns
+
+    def migrate_users_table(self, cursor, columns):
+        """Add columns missing from users tables created by older versions"""
+        if 'username' not in columns:
+            cursor.execute('ALTER TABLE users ADD COLUMN username TEXT')
+            logger.info("✅ Added username column to users table")
+
+        if 'first_name' not in columns:
+            cursor.execute('ALTER TABLE users ADD COLUMN first_name TEXT')
+            logger.info("✅ Added first_name column to users table")
+
+        if 'joined_at' not in columns:
+            cursor.execute('ALTER TABLE users ADD COLUMN joined_at TIMESTAMP')
+            cursor.execute("UPDATE users SET joined_at = CURRENT_TIMESTAMP WHERE joined_at IS NULL")
+            logger.info("✅ Added joined_at column to users table")
+
+        if 'last_activity' not in columns:
+            cursor.execute('ALTER TABLE users ADD COLUMN last_activity TIMESTAMP')
+            cursor.execute("UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE last_activity IS NULL")
+            logger.info("✅ Added last_activity column to users table")
+
+    def migrate_banned_users_table(self, cursor, columns):
+        """Add the CAS version column to existing banned_users tables"""
+        if 'version' not in columns:
+            cursor.execute('ALTER TABLE banned_users ADD COLUMN version INTEGER DEFAULT 0')
+            logger.info("✅ Added version column to banned_users table")
+
+    def add_user(self, user_id, username=None, first_name=None):
+        """Add a user to the database or refresh their activity in one upsert"""
+        with self.cursor() as cursor:
+            cursor.execute(ADD_USER_SQL[self.db_type], (user_id, username, first_name))
+            self.commit()
+
+    def touch_user(self, user_id, username=None, first_name=None):
+        """Queue an add_user upsert (refreshing last_activity) for the background writer"""
+        self._enqueue_event('user', (user_id, username, first_name))
 
     def remove_user(self, user_id):
         """Remove a user from the database"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'DELETE FROM users WHERE user_id = {placeholder}', (user_id,))
-        self.commit()
+        with self.cursor() as cursor:
+            cursor.execute(REMOVE_USER_SQL[self.db_type], (user_id,))
+            self.commit()
+            self._invalidate_user_stats()
 
-    def get_all_users(self):
-        """Retrieve all users with details"""
-        cursor = self.get_cursor()
-        cursor.execute('''
-            SELECT user_id, username, first_name, joined_at, last_activity 
-            FROM users ORDER BY joined_at DESC
-        ''')
-        results = cursor.fetchall()
+    def remove_users_bulk(self, user_ids):
+        """Remove many users in a single transaction, returning how many were deleted"""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return 0
+        try:
+            with self.cursor(transaction=True) as cursor:
+                if self.db_type == 'postgresql':
+                    cursor.execute(REMOVE_USERS_BULK_PG_SQL, (user_ids,))
+                else:
+                    cursor.executemany(REMOVE_USER_SQL['sqlite'], [(user_id,) for user_id in user_ids])
+                removed = cursor.rowcount
+        except Exception as e:
+            logger.error(f"Failed to bulk remove {len(user_ids)} users: {e}")
+            return 0
+        self._invalidate_user_stats()
+        return removed
+
+    def _iter_rows(self, sql):
+        """Yield the rows of a query FETCH_BATCH_SIZE at a time"""
         if self.db_type == 'postgresql':
-            return [dict(r) for r in results]
+            # A plain psycopg2 cursor loads the whole result at execute(); a named
+            # (server-side) cursor keeps it on the server, and only lives in a transaction
+            with self.cursor(transaction=True) as cursor:
+                with cursor.connection.cursor(name=f'stream_{uuid.uuid4().hex}',
+                                              cursor_factory=RealDictCursor) as stream:
+                    stream.itersize = FETCH_BATCH_SIZE
+                    stream.execute(sql)
+                    yield from stream
         else:
-            return [{
-                'user_id': r[0], 
-                'username': r[1], 
-                'first_name': r[2], 
-                'joined_at': r[3], 
-                'last_activity': r[4]
-            } for r in results]
+            with self.cursor() as cursor:
+                cursor.execute(sql)
+                cursor.arraysize = FETCH_BATCH_SIZE
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    yield from rows
+
+    def iter_all_users(self):
+        """Stream all users with details without materializing the whole table"""
+        for r in self._iter_rows('''
+            SELECT user_id, username, first_name, joined_at, last_activity 
+            FROM users ORDER BY joined_at DESC
+        '''):
+            yield dict(r)
+
+    def get_all_users(self):
+        """Retrieve all users with details"""
+        return list(self.iter_all_users())
 
     def get_active_users(self):
         """Retrieve all non-banned users for broadcasts"""
-        cursor = self.get_cursor()
-        cursor.execute('''
-            SELECT u.user_id, u.username, u.first_name, u.joined_at, u.last_activity 
-            FROM users u
-            LEFT JOIN banned_users b ON u.user_id = b.user_id
-            WHERE b.user_id IS NULL
-            ORDER BY u.joined_at DESC
-        ''')
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute('''
+                SELECT u.user_id, u.username, u.first_name, u.joined_at, u.last_activity 
+                FROM users u
+                LEFT JOIN banned_users b ON u.user_id = b.user_id
+                WHERE b.user_id IS NULL
+                ORDER BY u.joined_at DESC
+            ''')
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'user_id': r[0], 
-                'username': r[1], 
-                'first_name': r[2], 
-                'joined_at': r[3], 
-                'last_activity': r[4]
-            } for r in results]
+
+    def get_users_page(self, limit=USER_PAGE_SIZE, after=None, active_only=False):
+        """Get one page of users, newest first; after is the (joined_at, user_id) of the previous page's last row"""
+        params = (*after, limit) if after else (limit,)
+        with self.cursor() as cursor:
+            cursor.execute(USERS_PAGE_SQL[(active_only, after is not None)][self.db_type], params)
+            return [dict(r) for r in cursor.fetchall()]
+
+    def iter_users_paged(self, active_only=False, page_size=USER_PAGE_SIZE):
+        """Yield users page by page so no query or connection is held between pages"""
+        after = None
+        while True:
+            page = self.get_users_page(page_size, after, active_only)
+            yield from page
+            if len(page) < page_size:
+                break
+            after = (page[-1]['joined_at'], page[-1]['user_id'])
 
     def add_video(self, file_id, name, description):
         """Add a video to the database with a random UUID"""
         video_id = str(uuid.uuid4()) # Generate a unique ID
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(
-            f'INSERT INTO videos (id, file_id, name, description) VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})',
-            (video_id, file_id, name, description)
-        )
-        self.commit()
-        return video_id
+        with self.cursor() as cursor:
+            cursor.execute(ADD_VIDEO_SQL[self.db_type], (video_id, file_id, name, description))
+            self.commit()
+            self.invalidate_videos_cache()
+            return video_id
 
     def get_video_by_id(self, video_id):
-        """Retrieve a video by its ID"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'SELECT id, file_id, name, description FROM videos WHERE id = {placeholder}', (video_id,))
-        result = cursor.fetchone()
-        if result:
-            if self.db_type == 'postgresql':
+        """Retrieve a video by its ID (served from the video cache when possible)"""
+        video = self._video_cache.get(video_id)
+        if video is None:
+            if self.db_type == 'postgresql' and not _is_uuid(video_id):
+                return None
+            video = self._get_video_by_id_uncached(video_id)
+            if video is not None:
+                self._video_cache.set(video_id, video)
+        return video
+
+    def _get_video_by_id_uncached(self, video_id):
+        """Retrieve a video by its ID from the database"""
+        with self.cursor() as cursor:
+            cursor.execute(GET_VIDEO_BY_ID_SQL[self.db_type], (video_id,))
+            result = cursor.fetchone()
+            if result:
                 return dict(result)
-            else:
-                return {'id': result[0], 'file_id': result[1], 'name': result[2], 'description': result[3]}
-        return None
-
-    def get_all_videos(self):
-        """Retrieve all videos"""
-        cursor = self.get_cursor()
-        cursor.execute('SELECT id, file_id, name, description FROM videos')
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
-            return [dict(r) for r in results]
-        else:
-            return [{'id': r[0], 'file_id': r[1], 'name': r[2], 'description': r[3]} for r in results]
+            return None
+
+    def iter_all_videos(self):
+        """Stream all videos without materializing the whole table"""
+        for r in self._iter_rows('SELECT id, file_id, name, description FROM videos'):
+            yield dict(r)
+
+    @cached_query(LISTING_CACHE_TTL)
+    def get_videos_page(self, offset, limit):
+        """Get one page of (id, name) video rows, newest first"""
+        with self.cursor() as cursor:
+            cursor.execute(VIDEOS_PAGE_SQL[self.db_type], (limit, offset))
+            return [dict(r) for r in cursor.fetchall()]
+
+    def invalidate_videos_cache(self):
+        """Drop the cached video list, pages and counts after the catalogue changes"""
+        self._invalidate_query('get_videos_page', 'get_video_count', 'get_video_stats',
+                               'get_recent_videos', 'get_dashboard_counts', 'get_video_ids',
+                               'search_videos')
+        self.videos_version = next(self._video_versions)
+
+    @cached_query(LISTING_CACHE_TTL)
+    def get_video_ids(self):
+        """Get the id of every video as a tuple"""
+        with self.cursor(dict_rows=False) as cursor:
+            cursor.execute(VIDEO_IDS_SQL)
+            return tuple(map(_first_column, cursor.fetchall()))
 
     def get_random_video(self):
-        """Retrieve a random video"""
-        videos = self.get_all_videos()
-        return random.choice(videos) if videos else None
+        """Retrieve a random video, picked from the cached id list and served from the video cache"""
+        video_ids = self.get_video_ids()
+        if not video_ids:
+            return None
+        return self.get_video_by_id(random.choice(video_ids))
 
+    @cached_query(LISTING_CACHE_TTL)
     def search_videos(self, query):
-        """Search videos by name or description"""
-        cursor = self.get_cursor()
-        query_param = f'%{query}%'
-        if self.db_type == 'postgresql':
-            cursor.execute(
-                'SELECT id, file_id, name, description FROM videos WHERE name ILIKE %s OR description ILIKE %s',
-                (query_param, query_param)
-            )
-            return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute(
-                'SELECT id, file_id, name, description FROM videos WHERE name LIKE ? OR description LIKE ?',
-                (query_param, query_param)
-            )
-            results = cursor.fetchall()
-            return [{'id': r[0], 'file_id': r[1], 'name': r[2], 'description': r[3]} for r in results]
+        """Search videos by name or description (cached, so paging through results doesn't re-query)"""
+        with self.cursor() as cursor:
+            query_param = f'%{query}%'
+            if self.db_type == 'postgresql':
+                cursor.execute(
+                    'SELECT id, file_id, name, description FROM videos WHERE name ILIKE %s OR description ILIKE %s',
+                    (query_param, query_param)
+                )
+                return [dict(r) for r in cursor.fetchall()]
+            else:
+                fts_query = _fts_query(query)
+                if fts_query:
+                    cursor.execute(SEARCH_VIDEOS_FTS_SQL, (fts_query,))
+                else:
+                    cursor.execute(
+                        'SELECT id, file_id, name, description FROM videos WHERE name LIKE ? OR description LIKE ?',
+                        (query_param, query_param)
+                    )
+                return [dict(r) for r in cursor.fetchall()]
 
     def delete_video(self, video_id):
         """Delete a video by ID"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'DELETE FROM videos WHERE id = {placeholder}', (video_id,))
-        self.commit()
-        return cursor.rowcount > 0
+        if self.db_type == 'postgresql' and not _is_uuid(video_id):
+            return False
+        with self.cursor() as cursor:
+            cursor.execute(DELETE_VIDEO_SQL[self.db_type], (video_id,))
+            deleted = cursor.rowcount > 0
+            cursor.execute(DELETE_VIEW_COUNT_SQL[self.db_type], (video_id,))
+            self.commit()
+            self._video_cache.pop(video_id)
+            self.invalidate_videos_cache()
+            self._invalidate_video_stats()
+            return deleted
 
     # Admin Statistics Methods
+    @cached_query(STATS_CACHE_TTL)
     def get_user_count(self):
         """Get total number of users"""
-        cursor = self.get_cursor()
-        cursor.execute('SELECT COUNT(*) FROM users')
-        return cursor.fetchone()[0]
+        return self._fetch_value('SELECT COUNT(*) FROM users')
 
+    @cached_query(STATS_CACHE_TTL)
     def get_video_count(self):
         """Get total number of videos"""
-        cursor = self.get_cursor()
-        cursor.execute('SELECT COUNT(*) FROM videos')
-        return cursor.fetchone()[0]
+        return self._fetch_value('SELECT COUNT(*) FROM videos')
 
+    @cached_query(STATS_CACHE_TTL)
     def get_video_stats(self):
         """Get detailed video statistics"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
             cursor.execute('SELECT COUNT(*) as total, COUNT(CASE WHEN description != \'\' THEN 1 END) as with_desc FROM videos')
             result = cursor.fetchone()
             return {'total': result['total'], 'with_description': result['with_desc']}
-        else:
-            cursor.execute('SELECT COUNT(*) as total, COUNT(CASE WHEN description != "" THEN 1 END) as with_desc FROM videos')
-            result = cursor.fetchone()
-            return {'total': result[0], 'with_description': result[1]}
 
+    @cached_query(STATS_CACHE_TTL)
+    def get_dashboard_counts(self):
+        """Get user, video and described-video counts in a single query"""
+        with self.cursor() as cursor:
+            cursor.execute(DASHBOARD_COUNTS_SQL)
+            return dict(cursor.fetchone())
+
+    @cached_query(STATS_CACHE_TTL)
     def get_recent_videos(self, limit=5):
         """Get most recently added videos"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('SELECT id, name, description FROM videos ORDER BY created_at DESC LIMIT %s', (limit,))
+        with self.cursor() as cursor:
+            cursor.execute(RECENT_VIDEOS_SQL[self.db_type], (limit,))
             return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute('SELECT id, name, description FROM videos ORDER BY rowid DESC LIMIT ?', (limit,))
-            results = cursor.fetchall()
-            return [{'id': r[0], 'name': r[1], 'description': r[2]} for r in results]
 
     def clear_all_users(self):
         """Clear all users (admin only)"""
-        cursor = self.get_cursor()
-        cursor.execute('DELETE FROM users')
-        self.commit()
-        return cursor.rowcount
+        with self.cursor() as cursor:
+            cursor.execute('DELETE FROM users')
+            self.commit()
+            self._invalidate_user_stats()
+            return cursor.rowcount
 
     def clear_all_videos(self):
         """Clear all videos (admin only)"""
-        cursor = self.get_cursor()
-        cursor.execute('DELETE FROM videos')
-        self.commit()
-        return cursor.rowcount
+        with self.cursor() as cursor:
+            cursor.execute('DELETE FROM videos')
+            deleted = cursor.rowcount
+            cursor.execute('DELETE FROM video_view_counts')
+            self.commit()
+            self._video_cache.clear()
+            self.invalidate_videos_cache()
+            self._invalidate_video_stats()
+            return deleted
 
     # ===== ENHANCED USER MANAGEMENT METHODS =====
 
     def ban_user(self, user_id, banned_by, reason="No reason provided"):
-        """Ban a user"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO banned_users (user_id, banned_by, reason)
-                VALUES (%s, %s, %s) ON CONFLICT (user_id) DO UPDATE SET
-                banned_by = EXCLUDED.banned_by, reason = EXCLUDED.reason, banned_at = CURRENT_TIMESTAMP
-            ''', (user_id, banned_by, reason))
-        else:
-            cursor.execute('''
-                INSERT OR REPLACE INTO banned_users (user_id, banned_by, reason)
-                VALUES (?, ?, ?)
-            ''', (user_id, banned_by, reason))
-        self.log_user_activity(user_id, "banned", f"Banned by {banned_by}: {reason}")
-        self.commit()
-        return True
+        """Ban a user, retrying the version compare-and-swap on concurrent changes"""
+        with self.cursor() as cursor:
+            for _ in range(BAN_CAS_RETRIES):
+                cursor.execute(GET_BAN_VERSION_SQL[self.db_type], (user_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(INSERT_BAN_SQL[self.db_type], (user_id, banned_by, reason))
+                else:
+                    cursor.execute(CAS_BAN_SQL[self.db_type], (banned_by, reason, user_id, row['version']))
+                if cursor.rowcount > 0:
+                    break
+            else:
+                logger.error(f"Failed to ban {user_id}: banned_users row kept changing")
+                return False
+            self.log_user_activity(user_id, "banned", f"Banned by {banned_by}: {reason}")
+            self.commit()
+            self._banned_ids.add(user_id)
+            self._invalidate_ban_stats()
+            return True
 
     def unban_user(self, user_id):
         """Unban a user"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'DELETE FROM banned_users WHERE user_id = {placeholder}', (user_id,))
-        self.log_user_activity(user_id, "unbanned", "User unbanned")
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(UNBAN_USER_SQL[self.db_type], (user_id,))
+            self.log_user_activity(user_id, "unbanned", "User unbanned")
+            self.commit()
+            self._banned_ids.discard(user_id)
+            self._invalidate_ban_stats()
+            return cursor.rowcount > 0
 
     def is_user_banned(self, user_id):
-        """Check if a user is banned"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'SELECT user_id FROM banned_users WHERE user_id = {placeholder}', (user_id,))
-        return cursor.fetchone() is not None
+        """Check if a user is banned against the in-memory ban set"""
+        return user_id in self._banned_ids
+
+    def get_banned_user_ids(self):
+        """Load the ids of every banned user as a set"""
+        with self.cursor(dict_rows=False) as cursor:
+            cursor.execute(BANNED_USER_IDS_SQL[self.db_type])
+            return set(map(_first_column, cursor.fetchall()))
 
+    @cached_query(STATS_CACHE_TTL)
     def get_banned_users(self):
         """Get all banned users with details"""
-        cursor = self.get_cursor()
-        cursor.execute('''
-            SELECT b.user_id, u.username, u.first_name, b.banned_by, 
-                   b.banned_at, b.reason
-            FROM banned_users b
-            LEFT JOIN users u ON b.user_id = u.user_id
-            ORDER BY b.banned_at DESC
-        ''')
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute('''
+                SELECT b.user_id, u.username, u.first_name, b.banned_by, 
+                       b.banned_at, b.reason
+                FROM banned_users b
+                LEFT JOIN users u ON b.user_id = u.user_id
+                ORDER BY b.banned_at DESC
+            ''')
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'user_id': r[0], 
-                'username': r[1], 
-                'first_name': r[2], 
-                'banned_by': r[3],
-                'banned_at': r[4], 
-                'reason': r[5]
-            } for r in results]
 
     def log_user_activity(self, user_id, action, details=""):
-        """Log user activity"""
-        cursor = self.get_cursor()
+        """Queue a user activity row for the background writer"""
+        self._enqueue_event('activity', (user_id, action, details))
+
+    def _enqueue_event(self, kind, row):
+        """Timestamp a queued row now and hand it to the background writer"""
+        self._event_queue.put_nowait((kind, row + (_utc_timestamp(),)))
+
+    def _start_event_writer(self):
+        """Start the daemon thread that batches activity, view and user-touch writes"""
+        self._event_queue = queue.Queue()
+        threading.Thread(target=self._event_writer_loop, name='event-writer', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _event_writer_loop(self):
+        """Drain the queue every EVENT_FLUSH_INTERVAL or EVENT_BATCH_SIZE rows"""
+        while True:
+            batch = [self._event_queue.get()]
+            deadline = time.monotonic() + EVENT_FLUSH_INTERVAL
+            while len(batch) < EVENT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._event_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_events(batch)
+            except Exception as e:
+                # One bad row (e.g. a view of a just-deleted video) must not drop the whole batch
+                logger.error(f"Failed to write {len(batch)} queued events, retrying one by one: {e}")
+                for item in batch:
+                    try:
+                        self._write_events([item])
+                    except Exception as e:
+                        logger.error(f"Dropped queued {item[0]} event: {e}")
+            finally:
+                for _ in batch:
+                    self._event_queue.task_done()
+
+    def _write_events(self, batch):
+        """Insert a batch of queued events, grouped per table, in one transaction"""
+        # User upserts go first so event rows never reference a user not yet inserted
+        rows_by_kind = {'user': []}
+        for kind, row in batch:
+            rows_by_kind.setdefault(kind, []).append(row)
+        users = [row[:3] for row in rows_by_kind.pop('user')]
+        with self.cursor(transaction=True) as cursor:
+            if users:
+                cursor.executemany(ADD_USER_SQL[self.db_type], users)
+            for kind, rows in rows_by_kind.items():
+                self._insert_events(cursor, kind, rows)
+            self._add_view_counts(cursor, rows_by_kind.get('view'))
+
+    def _insert_events(self, cursor, kind, rows):
+        """Insert EVENT_TABLES rows of one kind on an open cursor"""
+        table, columns = EVENT_TABLES[kind]
         if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO user_activity (user_id, action, details)
-                VALUES (%s, %s, %s)
-            ''', (user_id, action, details))
+            if len(rows) >= COPY_MIN_ROWS:
+                self._copy_rows(cursor, table, columns, rows)
+            else:
+                execute_values(cursor, f'INSERT INTO {table} ({", ".join(columns)}) VALUES %s',
+                               rows, page_size=EVENT_BATCH_SIZE)
         else:
-            cursor.execute('''
-                INSERT INTO user_activity (user_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (user_id, action, details))
-        self.commit()
+            cursor.executemany(INSERT_EVENT_SQL[kind], rows)
+
+    def _add_view_counts(self, cursor, view_rows):
+        """Fold a batch of (video_id, user_id, action, timestamp) views into video_view_counts"""
+        if not view_rows:
+            return
+        counts = Counter(map(_first_column, view_rows))
+        if self.db_type == 'postgresql':
+            execute_values(cursor, '''
+                INSERT INTO video_view_counts (video_id, views) VALUES %s
+                ON CONFLICT (video_id) DO UPDATE SET views = video_view_counts.views + EXCLUDED.views
+            ''', list(counts.items()), page_size=EVENT_BATCH_SIZE)
+        else:
+            cursor.executemany(ADD_VIEW_COUNTS_SQL['sqlite'], counts.items())
+
+    @staticmethod
+    def _copy_rows(cursor, table, columns, rows):
+        """Bulk load rows into a PostgreSQL table with COPY ... FROM STDIN"""
+        # CSV COPY reads only an unquoted empty field as NULL, so None is written bare
+        # and every other value is quoted (a quoted "" stays an empty string)
+        buf = io.StringIO()
+        for row in rows:
+            buf.write(','.join('' if value is None else '"' + str(value).replace('"', '""') + '"'
+                               for value in row))
+            buf.write('\n')
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+    def flush(self):
+        """Block until every queued activity and view row has been written"""
+        self._event_queue.join()
 
     def get_user_activity(self, user_id, limit=10):
         """Get activity history for a specific user"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT action, details, timestamp 
-                FROM user_activity 
-                WHERE user_id = %s 
-                ORDER BY timestamp DESC 
-                LIMIT %s
-            ''', (user_id, limit))
+        with self.cursor() as cursor:
+            cursor.execute(USER_ACTIVITY_SQL[self.db_type], (user_id, limit))
             return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute('''
-                SELECT action, details, timestamp 
-                FROM user_activity 
-                WHERE user_id = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            ''', (user_id, limit))
-            results = cursor.fetchall()
-            return [{
-                'action': r[0], 
-                'details': r[1], 
-                'timestamp': r[2]
-            } for r in results]
 
+    @cached_query(RECENT_ACTIVITY_CACHE_TTL)
     def get_recent_activity(self, limit=20):
         """Get recent activity across all users"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT a.user_id, u.username, u.first_name, a.action, 
-                       a.details, a.timestamp 
-                FROM user_activity a
-                LEFT JOIN users u ON a.user_id = u.user_id
-                ORDER BY a.timestamp DESC 
-                LIMIT %s
-            ''', (limit,))
+        with self.cursor() as cursor:
+            cursor.execute(RECENT_ACTIVITY_SQL[self.db_type], (limit,))
             return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute('''
-                SELECT a.user_id, u.username, u.first_name, a.action, 
-                       a.details, a.timestamp 
-                FROM user_activity a
-                LEFT JOIN users u ON a.user_id = u.user_id
-                ORDER BY a.timestamp DESC 
-                LIMIT ?
-            ''', (limit,))
-            results = cursor.fetchall()
-            return [{
-                'user_id': r[0], 
-                'username': r[1], 
-                'first_name': r[2], 
-                'action': r[3],
-                'details': r[4], 
-                'timestamp': r[5]
-            } for r in results]
 
     def search_users(self, query):
-        """Search users by username or first name"""
-        cursor = self.get_cursor()
-        query_param = f'%{query}%'
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT user_id, username, first_name, joined_at, last_activity
-                FROM users 
-                WHERE username ILIKE %s OR first_name ILIKE %s OR CAST(user_id AS TEXT) ILIKE %s
-                ORDER BY last_activity DESC
-            ''', (query_param, query_param, query_param))
+        """Search users by username, first name or ID, flagging banned ones in is_banned"""
+        with self.cursor() as cursor:
+            query_param = f'%{query}%'
+            cursor.execute(SEARCH_USERS_SQL[self.db_type], (query_param, query_param, query_param))
             return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute('''
-                SELECT user_id, username, first_name, joined_at, last_activity
-                FROM users 
-                WHERE username LIKE ? OR first_name LIKE ? OR CAST(user_id AS TEXT) LIKE ?
-                ORDER BY last_activity DESC
-            ''', (query_param, query_param, query_param))
-            results = cursor.fetchall()
-            return [{
-                'user_id': r[0], 
-                'username': r[1], 
-                'first_name': r[2], 
-                'joined_at': r[3], 
-                'last_activity': r[4]
-            } for r in results]
 
+    @cached_query(STATS_CACHE_TTL)
     def get_user_stats_detailed(self):
-        """Get detailed user statistics"""
-        cursor = self.get_cursor()
-        
-        # Basic counts
-        cursor.execute('SELECT COUNT(*) FROM users')
-        total_users = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM banned_users')
-        banned_count = cursor.fetchone()[0]
-        
-        # Active users (last 7 days)
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT COUNT(*) FROM users 
-                WHERE last_activity > CURRENT_TIMESTAMP - INTERVAL '7 days'
-            ''')
-            active_users = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM users 
-                WHERE joined_at > CURRENT_TIMESTAMP - INTERVAL '7 days'
-            ''')
-            new_users = cursor.fetchone()[0]
-        else:
-            cursor.execute('''
-                SELECT COUNT(*) FROM users 
-                WHERE last_activity > datetime('now', '-7 days')
-            ''')
-            active_users = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM users 
-                WHERE joined_at > datetime('now', '-7 days')
-            ''')
-            new_users = cursor.fetchone()[0]
-        
-        return {
-            'total_users': total_users,
-            'banned_users': banned_count,
-            'active_users_7d': active_users,
-            'new_users_7d': new_users,
-            'active_users': total_users - banned_count
-        }
+        """Get detailed user statistics in a single scan of users"""
+        with self.cursor() as cursor:
+            if self.db_type == 'postgresql':
+                cursor.execute('''
+                    SELECT COUNT(*) AS total,
+                           (SELECT COUNT(*) FROM banned_users) AS banned,
+                           COUNT(*) FILTER (WHERE last_activity > CURRENT_TIMESTAMP - INTERVAL '7 days') AS active_7d,
+                           COUNT(*) FILTER (WHERE joined_at > CURRENT_TIMESTAMP - INTERVAL '7 days') AS new_7d
+                    FROM users
+                ''')
+                result = cursor.fetchone()
+                total_users, banned_count = result['total'], result['banned']
+                active_users, new_users = result['active_7d'], result['new_7d']
+            else:
+                cursor.execute('''
+                    SELECT COUNT(*),
+                           (SELECT COUNT(*) FROM banned_users),
+                           COALESCE(SUM(CASE WHEN last_activity > datetime('now', '-7 days') THEN 1 ELSE 0 END), 0),
+                           COALESCE(SUM(CASE WHEN joined_at > datetime('now', '-7 days') THEN 1 ELSE 0 END), 0)
+                    FROM users
+                ''')
+                total_users, banned_count, active_users, new_users = cursor.fetchone()
+
+            return {
+                'total_users': total_users,
+                'banned_users': banned_count,
+                'active_users_7d': active_users,
+                'new_users_7d': new_users,
+                'active_users': total_users - banned_count
+            }
 
     def bulk_ban_users(self, user_ids, banned_by, reason="Bulk ban"):
-        """Ban multiple users at once"""
-        cursor = self.get_cursor()
-        banned_count = 0
-        for user_id in user_ids:
-            try:
+        """Ban multiple users and log it, batched in a single transaction"""
+        rows = [(user_id, banned_by, reason) for user_id in dict.fromkeys(user_ids)]
+        if not rows:
+            return 0
+        timestamp = _utc_timestamp()
+        details = f"Bulk banned by {banned_by}: {reason}"
+        log_rows = [(user_id, "bulk_banned", details, timestamp) for user_id, _, _ in rows]
+        try:
+            with self.cursor(transaction=True) as cursor:
                 if self.db_type == 'postgresql':
-                    cursor.execute('''
+                    execute_values(cursor, '''
                         INSERT INTO banned_users (user_id, banned_by, reason)
-                        VALUES (%s, %s, %s) ON CONFLICT (user_id) DO UPDATE SET
-                        banned_by = EXCLUDED.banned_by, reason = EXCLUDED.reason, banned_at = CURRENT_TIMESTAMP
-                    ''', (user_id, banned_by, reason))
+                        VALUES %s ON CONFLICT (user_id) DO UPDATE SET
+                        banned_by = EXCLUDED.banned_by, reason = EXCLUDED.reason, banned_at = CURRENT_TIMESTAMP,
+                        version = banned_users.version + 1
+                    ''', rows, page_size=1000)
                 else:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO banned_users (user_id, banned_by, reason)
-                        VALUES (?, ?, ?)
-                    ''', (user_id, banned_by, reason))
-                self.log_user_activity(user_id, "bulk_banned", f"Bulk banned by {banned_by}: {reason}")
-                banned_count += 1
-            except Exception as e:
-                print(f"Failed to ban user {user_id}: {e}")
-        self.commit()
-        return banned_count
+                    cursor.executemany('''
+                        INSERT INTO banned_users (user_id, banned_by, reason)
+                        VALUES (?, ?, ?) ON CONFLICT (user_id) DO UPDATE SET
+                        banned_by = excluded.banned_by, reason = excluded.reason, banned_at = CURRENT_TIMESTAMP,
+                        version = banned_users.version + 1
+                    ''', rows)
+                self._insert_events(cursor, 'activity', log_rows)
+        except Exception as e:
+            logger.error(f"Failed to bulk ban {len(rows)} users: {e}")
+            return 0
+        self._banned_ids.update(user_id for user_id, _, _ in rows)
+        self._invalidate_ban_stats()
+        return len(rows)
 
     # ===== VIDEO ANALYTICS METHODS =====
     
     def log_video_view(self, video_id, user_id):
-        """Log a video view"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO video_analytics (video_id, user_id, action)
-                VALUES (%s, %s, 'view')
-            ''', (video_id, user_id))
-        else:
-            cursor.execute('''
-                INSERT INTO video_analytics (video_id, user_id, action)
-                VALUES (?, ?, 'view')
-            ''', (video_id, user_id))
-        self.commit()
+        """Queue a video view for the background writer"""
+        self._enqueue_event('view', (video_id, user_id, 'view'))
 
     def get_video_analytics(self, video_id):
         """Get analytics for a specific video"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT COUNT(*) as total_views,
-                   COUNT(DISTINCT user_id) as unique_viewers,
-                   MIN(timestamp) as first_view,
-                   MAX(timestamp) as last_view
-            FROM video_analytics 
-            WHERE video_id = {placeholder} AND action = 'view'
-        ''', (video_id,))
-        result = cursor.fetchone()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute(VIDEO_ANALYTICS_SQL[self.db_type], (video_id,))
+            result = cursor.fetchone()
             return dict(result)
-        else:
-            return {
-                'total_views': result[0],
-                'unique_viewers': result[1], 
-                'first_view': result[2],
-                'last_view': result[3]
-            }
 
+    def _invalidate_query(self, *method_names):
+        """Drop every cached_query result of the named methods"""
+        self._query_cache.discard_where(lambda key: key[0] in method_names)
+
+    def _invalidate_user_stats(self):
+        """Drop cached user counts after users are removed"""
+        self._invalidate_query('get_user_count', 'get_user_stats_detailed', 'get_dashboard_counts')
+
+    def _invalidate_ban_stats(self):
+        """Drop cached ban listings and counts after a ban or unban"""
+        self._invalidate_query('get_banned_users', 'get_user_stats_detailed')
+
+    def _invalidate_video_stats(self):
+        """Drop cached view rankings that may name a removed video"""
+        self._invalidate_query('get_popular_videos', 'get_analytics_summary', 'get_analytics_bundle')
+
+    @cached_query(POPULAR_VIDEOS_CACHE_TTL)
     def get_popular_videos(self, limit=10):
         """Get most popular videos by view count"""
-        cursor = self.get_cursor()
-        limit_placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT v.id, v.name, v.description, COUNT(va.id) as view_count
-            FROM videos v
-            LEFT JOIN video_analytics va ON v.id = va.video_id AND va.action = 'view'
-            GROUP BY v.id, v.name, v.description
-            ORDER BY view_count DESC
-            LIMIT {limit_placeholder}
-        ''', (limit,))
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute(POPULAR_VIDEOS_SQL[self.db_type], (limit,))
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0], 
-                'name': r[1], 
-                'description': r[2], 
-                'view_count': r[3]
-            } for r in results]
 
+    @cached_query(ANALYTICS_SUMMARY_CACHE_TTL)
     def get_analytics_summary(self):
-        """Get overall analytics summary"""
-        cursor = self.get_cursor()
-        
-        # Total views
-        cursor.execute('SELECT COUNT(*) FROM video_analytics WHERE action = \'view\'')
-        total_views = cursor.fetchone()[0]
-        
-        # Views today
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT COUNT(*) FROM video_analytics 
-                WHERE action = 'view' AND DATE(timestamp) = CURRENT_DATE
-            ''')
-        else:
-            cursor.execute('''
-                SELECT COUNT(*) FROM video_analytics 
-                WHERE action = "view" AND DATE(timestamp) = DATE('now')
-            ''')
-        views_today = cursor.fetchone()[0]
-        
-        # Most viewed video
-        cursor.execute('''
-            SELECT v.name, COUNT(va.id) as views 
-            FROM videos v
-            LEFT JOIN video_analytics va ON v.id = va.video_id AND va.action = 'view'
-            GROUP BY v.id, v.name
-            ORDER BY views DESC
-            LIMIT 1
-        ''')
-        top_video = cursor.fetchone()
-        
-        if self.db_type == 'postgresql':
-            return {
-                'total_views': total_views,
-                'views_today': views_today,
-                'top_video': {'name': top_video['name'], 'views': top_video['views']} if top_video else None
-            }
-        else:
-            return {
-                'total_views': total_views,
-                'views_today': views_today,
-                'top_video': {'name': top_video[0], 'views': top_video[1]} if top_video else None
-            }
+        """Get overall analytics summary in a single query"""
+        with self.cursor() as cursor:
+            cursor.execute(ANALYTICS_SUMMARY_SQL[self.db_type])
+            return self._analytics_summary(cursor.fetchone())
+
+    @cached_query(ANALYTICS_SUMMARY_CACHE_TTL)
+    def get_analytics_bundle(self, top_n=3):
+        """Get the analytics summary and the top_n videos on one connection checkout"""
+        with self.cursor() as cursor:
+            cursor.execute(ANALYTICS_SUMMARY_SQL[self.db_type])
+            summary = self._analytics_summary(cursor.fetchone())
+            cursor.execute(POPULAR_VIDEOS_SQL[self.db_type], (top_n,))
+            return summary, [dict(r) for r in cursor.fetchall()]
+
+    @staticmethod
+    def _analytics_summary(result):
+        """Shape an ANALYTICS_SUMMARY_SQL row into the summary dict"""
+        return {
+            'total_views': result['total_views'],
+            'views_today': result['views_today'],
+            'top_video': {'name': result['top_name'], 'views': result['top_views']} if result['top_name'] is not None else None
+        }
 
     # ===== MESSAGE TEMPLATES METHODS =====
     
     def add_template(self, name, content, created_by):
         """Add a message template"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO message_templates (name, content, created_by)
-                VALUES (%s, %s, %s) ON CONFLICT (name) DO UPDATE SET
-                content = EXCLUDED.content, created_by = EXCLUDED.created_by, created_at = CURRENT_TIMESTAMP
-            ''', (name, content, created_by))
-        else:
-            cursor.execute('''
-                INSERT OR REPLACE INTO message_templates (name, content, created_by)
-                VALUES (?, ?, ?)
-            ''', (name, content, created_by))
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(UPSERT_TEMPLATE_SQL[self.db_type], (name, content, created_by))
+            self.commit()
+            self._invalidate_query('get_templates')
+            return cursor.rowcount > 0
 
+    def add_templates_bulk(self, templates):
+        """Upsert many (name, content, created_by) templates in a single batched transaction"""
+        # Last write wins per name; one statement cannot upsert the same key twice on PostgreSQL
+        rows = list({_first_column(row): row for row in templates}.values())
+        if not rows:
+            return 0
+        try:
+            with self.cursor(transaction=True) as cursor:
+                if self.db_type == 'postgresql':
+                    execute_values(cursor, BULK_UPSERT_TEMPLATES_SQL, rows, page_size=1000)
+                else:
+                    cursor.executemany(UPSERT_TEMPLATE_SQL['sqlite'], rows)
+        except Exception as e:
+            logger.error(f"Failed to bulk add {len(rows)} templates: {e}")
+            return 0
+        self._invalidate_query('get_templates')
+        return len(rows)
+
+    @cached_query(LISTING_CACHE_TTL)
     def get_templates(self):
         """Get all message templates"""
-        cursor = self.get_cursor()
-        cursor.execute('''
-            SELECT id, name, content, created_by, created_at
-            FROM message_templates
-            ORDER BY name
-        ''')
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute('''
+                SELECT id, name, content, created_by, created_at
+                FROM message_templates
+                ORDER BY name
+            ''')
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0],
-                'name': r[1], 
-                'content': r[2], 
-                'created_by': r[3],
-                'created_at': r[4]
-            } for r in results]
 
     def get_template_by_name(self, name):
         """Get a template by name"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT id, name, content, created_by, created_at
-            FROM message_templates
-            WHERE name = {placeholder}
-        ''', (name,))
-        result = cursor.fetchone()
-        if result:
-            if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute(GET_TEMPLATE_SQL[self.db_type], (name,))
+            result = cursor.fetchone()
+            if result:
                 return dict(result)
-            else:
-                return {
-                    'id': result[0],
-                    'name': result[1], 
-                    'content': result[2], 
-                    'created_by': result[3],
-                    'created_at': result[4]
-                }
-        return None
+            return None
 
     def delete_template(self, name):
         """Delete a template by name"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'DELETE FROM message_templates WHERE name = {placeholder}', (name,))
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(DELETE_TEMPLATE_SQL[self.db_type], (name,))
+            self.commit()
+            self._invalidate_query('get_templates')
+            return cursor.rowcount > 0
 
     # ===== SCHEDULED BROADCASTS METHODS =====
     
     def add_scheduled_broadcast(self, admin_id, target_channel, content_type, content, 
                                media_file_id, scheduled_time):
         """Add a scheduled broadcast"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO scheduled_broadcasts 
-                (admin_id, target_channel, content_type, content, media_file_id, scheduled_time)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            ''', (admin_id, target_channel, content_type, content, media_file_id, scheduled_time))
-        else:
-            cursor.execute('''
-                INSERT INTO scheduled_broadcasts 
-                (admin_id, target_channel, content_type, content, media_file_id, scheduled_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (admin_id, target_channel, content_type, content, media_file_id, scheduled_time))
-        self.commit()
-        return cursor.lastrowid
+        with self.cursor() as cursor:
+            cursor.execute(ADD_BROADCAST_SQL[self.db_type],
+                           (admin_id, target_channel, content_type, content, media_file_id, scheduled_time))
+            self.commit()
+            self._invalidate_query('get_scheduled_broadcasts', 'get_scheduled_counts')
+            self._broadcast_scheduled.set()
+            return cursor.lastrowid
+
+    def seconds_until_next_broadcast(self):
+        """Seconds until the earliest pending broadcast is due (negative if overdue), or None"""
+        delay = self._fetch_value(NEXT_BROADCAST_DELAY_SQL[self.db_type])
+        return float(delay) if delay is not None else None
+
+    def wait_for_broadcasts(self, timeout):
+        """Sleep up to timeout seconds, waking early when a broadcast is scheduled"""
+        self._broadcast_scheduled.wait(timeout)
+        self._broadcast_scheduled.clear()
 
     def get_pending_broadcasts(self):
         """Get all pending scheduled broadcasts"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                SELECT id, admin_id, target_channel, content_type, content, media_file_id, scheduled_time
-                FROM scheduled_broadcasts 
-                WHERE status = 'pending' AND scheduled_time <= CURRENT_TIMESTAMP
-                ORDER BY scheduled_time ASC
-            ''')
+        with self.cursor() as cursor:
+            cursor.execute(PENDING_BROADCASTS_SQL[self.db_type])
             return [dict(r) for r in cursor.fetchall()]
-        else:
-            cursor.execute('''
-                SELECT id, admin_id, target_channel, content_type, content, media_file_id, scheduled_time
-                FROM scheduled_broadcasts 
-                WHERE status = 'pending' AND scheduled_time <= datetime('now')
-                ORDER BY scheduled_time ASC
-            ''')
-            results = cursor.fetchall()
-            return [{
-                'id': r[0], 
-                'admin_id': r[1], 
-                'target_channel': r[2], 
-                'content_type': r[3],
-                'content': r[4], 
-                'media_file_id': r[5],
-                'scheduled_time': r[6]
-            } for r in results]
 
     def update_broadcast_status(self, broadcast_id, status):
         """Update the status of a scheduled broadcast"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('UPDATE scheduled_broadcasts SET status = %s WHERE id = %s', (status, broadcast_id))
-        else:
-            cursor.execute('UPDATE scheduled_broadcasts SET status = ? WHERE id = ?', (status, broadcast_id))
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(UPDATE_BROADCAST_STATUS_SQL[self.db_type], (status, broadcast_id))
+            self.commit()
+            self._invalidate_query('get_scheduled_broadcasts', 'get_scheduled_counts')
+            return cursor.rowcount > 0
 
+    @cached_query(LISTING_CACHE_TTL)
     def get_scheduled_broadcasts(self, admin_id=None, limit=50):
         """Get scheduled broadcasts, optionally filtered by admin"""
-        cursor = self.get_cursor()
-        if admin_id:
-            if self.db_type == 'postgresql':
-                cursor.execute('''
-                    SELECT id, admin_id, target_channel, content_type, content, 
-                           media_file_id, scheduled_time, status, created_at
-                    FROM scheduled_broadcasts 
-                    WHERE admin_id = %s
-                    ORDER BY scheduled_time DESC
-                    LIMIT %s
-                ''', (admin_id, limit))
+        with self.cursor() as cursor:
+            if admin_id:
+                cursor.execute(ADMIN_BROADCASTS_SQL[self.db_type], (admin_id, limit))
             else:
-                cursor.execute('''
-                    SELECT id, admin_id, target_channel, content_type, content, 
-                           media_file_id, scheduled_time, status, created_at
-                    FROM scheduled_broadcasts 
-                    WHERE admin_id = ?
-                    ORDER BY scheduled_time DESC
-                    LIMIT ?
-                ''', (admin_id, limit))
-        else:
-            limit_placeholder = '%s' if self.db_type == 'postgresql' else '?'
-            cursor.execute(f'''
-                SELECT id, admin_id, target_channel, content_type, content, 
-                       media_file_id, scheduled_time, status, created_at
-                FROM scheduled_broadcasts 
-                ORDER BY scheduled_time DESC
-                LIMIT {limit_placeholder}
-            ''', (limit,))
-        
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+                cursor.execute(ALL_BROADCASTS_SQL[self.db_type], (limit,))
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0], 
-                'admin_id': r[1], 
-                'target_channel': r[2], 
-                'content_type': r[3],
-                'content': r[4], 
-                'media_file_id': r[5],
-                'scheduled_time': r[6], 
-                'status': r[7], 
-                'created_at': r[8]
-            } for r in results]
+
+    @cached_query(LISTING_CACHE_TTL)
+    def get_scheduled_counts(self, admin_id):
+        """Count an admin's scheduled broadcasts in total and still pending"""
+        with self.cursor() as cursor:
+            cursor.execute(BROADCAST_COUNTS_SQL[self.db_type], (admin_id,))
+            return dict(cursor.fetchone())
 
     # ===== CATEGORIES METHODS =====
     
     def add_category(self, name, description, color, created_by):
         """Add a new category"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO categories (name, description, color, created_by)
-                VALUES (%s, %s, %s, %s) ON CONFLICT (name) DO UPDATE SET
-                description = EXCLUDED.description, color = EXCLUDED.color, created_by = EXCLUDED.created_by
-            ''', (name, description, color, created_by))
-        else:
-            cursor.execute('''
-                INSERT OR REPLACE INTO categories (name, description, color, created_by)
-                VALUES (?, ?, ?, ?)
-            ''', (name, description, color, created_by))
-        self.commit()
-        return cursor.lastrowid
+        with self.cursor() as cursor:
+            cursor.execute(ADD_CATEGORY_SQL[self.db_type], (name, description, color, created_by))
+            self.commit()
+            self._invalidate_query('get_categories')
+            return cursor.lastrowid
 
+    @cached_query(LISTING_CACHE_TTL)
     def get_categories(self):
         """Get all categories"""
-        cursor = self.get_cursor()
-        cursor.execute('''
-            SELECT id, name, description, color, created_by, created_at
-            FROM categories
-            ORDER BY name
-        ''')
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute('''
+                SELECT id, name, description, color, created_by, created_at
+                FROM categories
+                ORDER BY name
+            ''')
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0],
-                'name': r[1], 
-                'description': r[2], 
-                'color': r[3],
-                'created_by': r[4], 
-                'created_at': r[5]
-            } for r in results]
 
     def get_category_by_name(self, name):
         """Get a category by name"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT id, name, description, color, created_by, created_at
-            FROM categories
-            WHERE name = {placeholder}
-        ''', (name,))
-        result = cursor.fetchone()
-        if result:
-            if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute(GET_CATEGORY_SQL[self.db_type], (name,))
+            result = cursor.fetchone()
+            if result:
                 return dict(result)
-            else:
-                return {
-                    'id': result[0],
-                    'name': result[1], 
-                    'description': result[2], 
-                    'color': result[3],
-                    'created_by': result[4], 
-                    'created_at': result[5]
-                }
-        return None
+            return None
 
     def delete_category(self, category_id):
         """Delete a category by ID"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'DELETE FROM categories WHERE id = {placeholder}', (category_id,))
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(DELETE_CATEGORY_SQL[self.db_type], (category_id,))
+            self.commit()
+            self._invalidate_query('get_categories')
+            return cursor.rowcount > 0
 
     def assign_video_category(self, video_id, category_id, assigned_by):
         """Assign a category to a video"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('''
-                INSERT INTO video_categories (video_id, category_id, assigned_by)
-                VALUES (%s, %s, %s) ON CONFLICT (video_id, category_id) DO UPDATE SET
-                assigned_by = EXCLUDED.assigned_by, assigned_at = CURRENT_TIMESTAMP
-            ''', (video_id, category_id, assigned_by))
-        else:
-            cursor.execute('''
-                INSERT OR REPLACE INTO video_categories (video_id, category_id, assigned_by)
-                VALUES (?, ?, ?)
-            ''', (video_id, category_id, assigned_by))
-        self.commit()
-        return cursor.rowcount > 0
+        with self.cursor() as cursor:
+            cursor.execute(ASSIGN_CATEGORY_SQL[self.db_type], (video_id, category_id, assigned_by))
+            self.commit()
+            return cursor.rowcount > 0
+
+    def assign_video_categories_bulk(self, assignments):
+        """Assign many (video_id, category_id, assigned_by) rows in a single batched transaction"""
+        rows = list({_first_two_columns(row): row for row in assignments}.values())
+        if not rows:
+            return 0
+        try:
+            with self.cursor(transaction=True) as cursor:
+                if self.db_type == 'postgresql':
+                    execute_values(cursor, BULK_ASSIGN_CATEGORIES_SQL, rows, page_size=1000)
+                else:
+                    cursor.executemany(ASSIGN_CATEGORY_SQL['sqlite'], rows)
+        except Exception as e:
+            logger.error(f"Failed to bulk assign {len(rows)} video categories: {e}")
+            return 0
+        return len(rows)
 
     def get_video_categories(self, video_id):
         """Get all categories for a video"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT c.id, c.name, c.description, c.color, vc.assigned_by, vc.assigned_at
-            FROM categories c
-            JOIN video_categories vc ON c.id = vc.category_id
-            WHERE vc.video_id = {placeholder}
-            ORDER BY c.name
-        ''', (video_id,))
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+        with self.cursor() as cursor:
+            cursor.execute(VIDEO_CATEGORIES_SQL[self.db_type], (video_id,))
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0],
-                'name': r[1], 
-                'description': r[2], 
-                'color': r[3],
-                'assigned_by': r[4], 
-                'assigned_at': r[5]
-            } for r in results]
-
-    def get_videos_by_category(self, category_id):
-        """Get all videos in a category"""
-        cursor = self.get_cursor()
-        placeholder = '%s' if self.db_type == 'postgresql' else '?'
-        cursor.execute(f'''
-            SELECT v.id, v.file_id, v.name, v.description, v.created_at
-            FROM videos v
-            JOIN video_categories vc ON v.id = vc.video_id
-            WHERE vc.category_id = {placeholder}
-            ORDER BY v.name
-        ''', (category_id,))
-        results = cursor.fetchall()
-        if self.db_type == 'postgresql':
+
+    def get_videos_by_category(self, category_id, fields=('id', 'name')):
+        """Get all videos in a category, selecting only the requested VIDEO_LISTING_FIELDS"""
+        sql = _videos_by_category_sql(tuple(fields))
+        with self.cursor() as cursor:
+            cursor.execute(sql[self.db_type], (category_id,))
+            results = cursor.fetchall()
             return [dict(r) for r in results]
-        else:
-            return [{
-                'id': r[0],
-                'file_id': r[1], 
-                'name': r[2], 
-                'description': r[3],
-                'created_at': r[4]
-            } for r in results]
 
     def remove_video_category(self, video_id, category_id):
         """Remove a category from a video"""
-        cursor = self.get_cursor()
-        if self.db_type == 'postgresql':
-            cursor.execute('DELETE FROM video_categories WHERE video_id = %s AND category_id = %s', 
-                         (video_id, category_id))
-        else:
-            cursor.execute('DELETE FROM video_categories WHERE video_id = ? AND category_id = ?', 
-                         (video_id, category_id))
-        self.commit()
-        return cursor.rowcount > 0
\ No newline at end of file
+        with self.cursor() as cursor:
+            cursor.execute(REMOVE_VIDEO_CATEGORY_SQL[self.db_type], (video_id, category_id))
+            self.commit()
+            return cursor.rowcount > 0
\ No newline at end of file
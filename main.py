@@ -1,20 +1,55 @@
 import os
+import sys
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+import platform
+import functools
+import json
+import hashlib
+import random
+import heapq
+import itertools
 import telebot
 from telebot import types
 from telebot.apihelper import ApiTelegramException
 from database import Database
+from cache import TTLCache
+from ratelimit import TokenBucket
 import time
 import threading
-import re
-from datetime import datetime, timedelta
-from flask import Flask, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import Flask, Response, request
 import requests
+try:
+    from waitress import serve
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+# Handlers only enqueue log records; one listener thread does the stdout writes,
+# so bot workers, the timer jobs and waitress threads never wait on the stream lock
+log_queue = queue.SimpleQueue()
+log_stream = logging.StreamHandler(sys.stdout)
+log_stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+log_listener = QueueListener(log_queue, log_stream)
+log_listener.start()
+atexit.register(log_listener.stop)
+logging.getLogger().addHandler(QueueHandler(log_queue))
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Initialize bot with token from environment variable
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN not set in environment variables")
-bot = telebot.TeleBot(BOT_TOKEN)
+# Handlers run on a worker pool so one slow update doesn't stall the others
+BOT_WORKER_THREADS = int(os.getenv('BOT_WORKER_THREADS', '8'))
+bot = telebot.TeleBot(BOT_TOKEN, num_threads=BOT_WORKER_THREADS)
+# Only the update types we have handlers for, so Telegram sends nothing else
+ALLOWED_UPDATES = ['message', 'callback_query']
 
 # Load environment variables
 ADMINS = [
@@ -22,15 +57,86 @@ ADMINS = [
     if admin_id.strip().isdigit()
 ]
 OWNER = int(os.getenv('OWNER', '0'))
+# Everyone allowed to use admin commands, for O(1) permission checks
+ADMIN_IDS = frozenset(ADMINS) | {OWNER}
 CHANNEL_1 = os.getenv('CHANNEL_1', '')
 CHANNEL_2 = os.getenv('CHANNEL_2', '')
+# Join-gate channels normalized with an @ prefix once, not on every membership check
+REQUIRED_CHANNELS = tuple(
+    channel if channel.startswith('@') else f'@{channel}'
+    for channel in (CHANNEL_1, CHANNEL_2) if channel)
+# Join-prompt invite buttons, built once and shared by every prompt keyboard
+JOIN_CHANNEL_BUTTONS = tuple(
+    types.InlineKeyboardButton(f"📢 Join Channel {number}",
+                               url=f"https://t.me/{channel.lstrip('@')}")
+    for number, channel in ((1, CHANNEL_1), (2, CHANNEL_2)) if channel)
 join_access_enabled = False  # Global flag for channel join requirement
 
 # Initialize database
 db = Database()
 
-# User states for handling multi-step input
-user_states = {}
+# Long-lived pool for running independent reads of one handler concurrently;
+# its threads persist, so each keeps its own database connection warm
+DB_READ_WORKERS = 4
+db_read_pool = ThreadPoolExecutor(max_workers=DB_READ_WORKERS,
+                                  thread_name_prefix='db-read')
+
+
+def run_concurrently(*calls):
+    """Run independent zero-argument calls on db_read_pool, returning results in order"""
+    futures = [db_read_pool.submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+
+# Pool for slow Bot API work (panel renders and their edit_message_text), so a
+# bot worker is free for the next update as soon as the callback is answered
+API_POOL_WORKERS = int(os.getenv('API_POOL_WORKERS', '16'))
+api_pool = ThreadPoolExecutor(max_workers=API_POOL_WORKERS,
+                              thread_name_prefix='tg-api')
+
+
+def run_in_background(func, *args):
+    """Run func(*args) on api_pool, logging any exception instead of dropping it"""
+    def run():
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error(f"❌ Background {func.__name__} failed: {e}")
+    api_pool.submit(run)
+
+# Channel membership lookups keyed by (channel, user_id); members rarely leave,
+# while non-members are rechecked sooner so a fresh join is picked up quickly
+MEMBER_STATUSES = frozenset({'member', 'administrator', 'creator'})
+MEMBERSHIP_CACHE_TTL = 300
+NON_MEMBER_CACHE_TTL = 30
+membership_cache = TTLCache(maxsize=100_000, ttl=MEMBERSHIP_CACHE_TTL)
+
+# Admin @usernames shown by /admin; staff identities rarely change
+username_cache = TTLCache(maxsize=64, ttl=3600)
+
+# Per-user fan-outs (/broadcast, /cleanup_users) run on a worker pool, paced just
+# under Telegram's ~30 msg/s limit
+BROADCAST_WORKERS = 20
+BROADCAST_RATE = 28
+BROADCAST_CHUNK_SIZE = 500
+
+# Scheduled-broadcast poll interval while idle, backing off up to the maximum
+BROADCAST_POLL_INTERVAL = 60
+BROADCAST_MAX_POLL_INTERVAL = 300
+
+# User states for handling multi-step input; abandoned upload and broadcast
+# flows expire instead of accumulating, and every state write restarts the TTL
+USER_STATE_TTL = 1800
+user_states = TTLCache(maxsize=10_000, ttl=USER_STATE_TTL)
+
+# Callback query ids already handled, so a query redelivered after a polling restart
+# doesn't resend videos or re-run admin actions
+seen_callbacks = TTLCache(maxsize=4096, ttl=900)
+
+
+def first_delivery(call):
+    """Record a callback query and return False if it was already handled"""
+    return seen_callbacks.add(call.id)
 
 # States for channel broadcasting
 BROADCAST_STATES = {
@@ -41,49 +147,182 @@ BROADCAST_STATES = {
 
 # Track bot start time for uptime calculation
 bot_start_time = datetime.now()
+# Monotonic anchor for cheap uptime math that ignores wall-clock adjustments
+bot_start_monotonic = time.monotonic()
 
 # Cache bot info to avoid API calls in health checks
 bot_info_cache = None
+# get_me() is also persisted so cold starts don't block on it; keyed by token hash
+BOT_INFO_PATH = os.getenv('BOT_INFO_PATH', '/tmp/bot_info.json')
+BOT_TOKEN_HASH = hashlib.sha256(BOT_TOKEN.encode()).hexdigest()
+
+
+def get_bot_username():
+    """The bot's @username, fetched once with get_me() and cached for the process"""
+    if bot_info_cache is None:
+        refresh_bot_info()
+    return bot_info_cache['username']
+
+
+def refresh_bot_info():
+    """Fetch get_me() into bot_info_cache and persist it to BOT_INFO_PATH"""
+    global bot_info_cache
+    bot_info_cache = {'username': bot.get_me().username}
+    try:
+        tmp_path = f"{BOT_INFO_PATH}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'token_hash': BOT_TOKEN_HASH, **bot_info_cache}, f)
+        os.replace(tmp_path, BOT_INFO_PATH)
+    except OSError as e:
+        logger.error(f"Failed to save bot info to {BOT_INFO_PATH}: {e}")
+
+
+def load_bot_info():
+    """Fill bot_info_cache from BOT_INFO_PATH if it was saved for this token"""
+    global bot_info_cache
+    try:
+        with open(BOT_INFO_PATH) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if saved.get('token_hash') != BOT_TOKEN_HASH or not saved.get('username'):
+        return False
+    bot_info_cache = {'username': saved['username']}
+    return True
 
 # Flask app for health checks and keep-alive (Render free tier)
 app = Flask(__name__)
+PORT = int(os.getenv('PORT', '5000'))  # Render will override with PORT env var
+RENDER_EXTERNAL_URL = os.getenv('RENDER_EXTERNAL_URL')
+
+# Serialized /health body, rebuilt at most every few seconds so pings coalesce
+HEALTH_CACHE_TTL = 5
+health_cache = TTLCache(maxsize=1, ttl=HEALTH_CACHE_TTL)
 
 @app.route('/health')
 def health_check():
     """Health check endpoint for Render"""
-    uptime = datetime.now() - bot_start_time
-    return jsonify({
-        'status': 'healthy',
-        'uptime_seconds': int(uptime.total_seconds()),
-        'bot_username': bot_info_cache.get('username', 'unknown') if bot_info_cache else 'unknown'
-    })
+    body = health_cache.get('health')
+    if body is None:
+        body = json.dumps({
+            'status': 'healthy',
+            'uptime_seconds': int(time.monotonic() - bot_start_monotonic),
+            'bot_username': bot_info_cache.get('username', 'unknown') if bot_info_cache else 'unknown'
+        }).encode()
+        health_cache.set('health', body)
+    return Response(body, mimetype='application/json')
+
+# The root response never changes, so it is serialized once
+HOME_BODY = json.dumps({'message': 'Video Bot is running!', 'status': 'online'}).encode()
 
 @app.route('/')
 def home():
     """Root endpoint"""
-    return jsonify({'message': 'Video Bot is running!', 'status': 'online'})
+    return Response(HOME_BODY, mimetype='application/json')
+
+# With a public URL Telegram pushes updates to this app instead of us long-polling;
+# USE_WEBHOOK=0 forces polling. The path and secret header derive from the token hash
+USE_WEBHOOK = bool(RENDER_EXTERNAL_URL) and os.getenv('USE_WEBHOOK', '1') != '0'
+WEBHOOK_SECRET = BOT_TOKEN_HASH[:32]
+WEBHOOK_PATH = f"/webhook/{WEBHOOK_SECRET}"
+
+@app.route(WEBHOOK_PATH, methods=['POST'])
+def telegram_webhook():
+    """Receive an update from Telegram and hand it to the bot's worker threads"""
+    if request.headers.get('X-Telegram-Bot-Api-Secret-Token') != WEBHOOK_SECRET:
+        return Response(status=403)
+    try:
+        update = types.Update.de_json(request.get_data(as_text=True))
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"⚠️ Ignoring malformed webhook update: {e}")
+        return Response(status=400)
+    bot.process_new_updates([update])
+    return Response(status=200)
+
+# Ping every 14 minutes (before Render's 15-minute idle timeout), retrying sooner on failure
+KEEP_ALIVE_INTERVAL = 840
+KEEP_ALIVE_RETRY = 300
+
+
+def start_keep_alive(render_url):
+    """Schedule self-pings on the timer thread to prevent Render free tier from sleeping"""
+    # One pooled connection reused across pings; urllib3 retries transient connection
+    # errors with backoff before a ping counts as failed
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_maxsize=1,
+        max_retries=requests.adapters.Retry(total=3, backoff_factor=0.5))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    due = time.monotonic() + KEEP_ALIVE_INTERVAL
+    schedule_job_at(due, keep_alive_ping, session, f"{render_url}/health", due)
+
+
+def keep_alive_ping(session, url, due):
+    """Send one keep-alive ping and schedule the next on a monotonic cadence that doesn't drift"""
+    try:
+        session.get(url, timeout=10)
+        logger.info("🔄 Keep-alive ping sent successfully")
+        next_due = due + KEEP_ALIVE_INTERVAL
+    except Exception as e:
+        logger.warning(f"⚠️ Keep-alive ping failed: {e}")
+        next_due = due + KEEP_ALIVE_RETRY
+    schedule_job_at(next_due, keep_alive_ping, session, url, next_due)
 
-def keep_alive_ping():
-    """Self-ping to prevent Render free tier from sleeping"""
-    render_url = os.getenv('RENDER_EXTERNAL_URL')  # Set this in Render environment
-    if not render_url:
-        print("⚠️ RENDER_EXTERNAL_URL not set - keep-alive ping disabled")
-        return
-    
-    while True:
-        try:
-            time.sleep(840)  # Ping every 14 minutes (before 15-minute timeout)
-            requests.get(f"{render_url}/health", timeout=10)
-            print("🔄 Keep-alive ping sent successfully")
-        except Exception as e:
-            print(f"⚠️ Keep-alive ping failed: {e}")
-            time.sleep(300)  # Wait 5 minutes before retrying on failure
 
+# Characters escaped for MarkdownV2, including the whole '+' through '=' range
+# (digits and ,./:;< too), which Telegram accepts escaped
+MARKDOWN_V2_ESCAPES = str.maketrans({
+    char: '\\' + char
+    for char in '_*[]()~`>#|{}.!' + ''.join(map(chr, range(ord('+'), ord('=') + 1)))
+})
 
+
+@functools.lru_cache(maxsize=4096)
 def escape_markdown_v2(text):
     """Helper function to escape special characters for MarkdownV2."""
-    special_chars = r"([_*[\]()~`>#+-=|{}.!])"
-    return re.sub(special_chars, r"\\\1", text)
+    return text.translate(MARKDOWN_V2_ESCAPES)
+
+
+# Process-lifetime constants for /system_info, escaped once
+PYTHON_VERSION_MD = escape_markdown_v2(
+    f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}")
+PLATFORM_MD = escape_markdown_v2(platform.platform())
+
+
+@functools.lru_cache(maxsize=1024)
+def video_caption(name, description, random_pick=False):
+    """MarkdownV2 caption for a sent video, built once per video rather than per send"""
+    if random_pick:
+        return f"🎲 Random video: {escape_markdown_v2(name)}\n\n{escape_markdown_v2(description)}"
+    return f"🎥 *{escape_markdown_v2(name)}*\n\n{escape_markdown_v2(description)}"
+
+
+def truncate(text, limit):
+    """Cut text to at most limit characters, ending a cut with a one-character ellipsis"""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def truncate_markdown_v2(text, limit=30):
+    """Truncate text for display and escape it for MarkdownV2"""
+    return escape_markdown_v2(truncate(text, limit))
+
+
+# Telegram rejects messages longer than this
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def split_message_lines(lines, limit=TELEGRAM_MESSAGE_LIMIT):
+    """Join lines into as few newline-separated messages as fit within limit"""
+    chunks, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > limit:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    chunks.append("\n".join(current))
+    return chunks
 
 
 def check_user_access(user_id,
@@ -94,15 +333,14 @@ def check_user_access(user_id,
     Comprehensive user access check with ban enforcement and activity logging
     Returns True if user can proceed, False if banned
     """
-    # Update user information and activity
-    db.add_user(user_id, username, first_name)
+    # Both writes are queued for the background writer and the ban check is an
+    # in-memory set lookup, so nothing here waits on the database. Staff get a users
+    # row too, since activity, broadcasts and templates reference it
+    db.touch_user(user_id, username, first_name)
     db.log_user_activity(user_id, action, f"Attempted: {action}")
-
-    # Check if user is banned
-    if db.is_user_banned(user_id):
-        return False
-
-    return True
+    if user_id in ADMIN_IDS:
+        return True  # Staff can't be banned
+    return not db.is_user_banned(user_id)
 
 
 def send_banned_message(message_or_chat_id):
@@ -117,26 +355,97 @@ def send_banned_message(message_or_chat_id):
                          "🚫 You are banned from using this bot\\.",
                          parse_mode='MarkdownV2')
     except Exception as e:
-        print(f"Failed to send banned message to {chat_id}: {e}")
+        logger.error(f"Failed to send banned message to {chat_id}: {e}")
+
+
+# Delayed jobs (video deletions, keep-alive pings) share one timer thread draining
+# a heap of (due, seq, func, args), instead of one sleeping thread per job
+VIDEO_DELETE_DELAY = 1200
+timer_jobs = []
+timer_jobs_cv = threading.Condition()
+timer_job_seq = itertools.count()  # Tie-breaker so the heap never compares functions
+
+
+def schedule_job_at(due, func, *args):
+    """Run func(*args) on the timer thread once time.monotonic() reaches due"""
+    with timer_jobs_cv:
+        heapq.heappush(timer_jobs, (due, next(timer_job_seq), func, args))
+        timer_jobs_cv.notify()
+
+
+def schedule_message_deletion(chat_id, message_id, delay=VIDEO_DELETE_DELAY):
+    """Queue a message for deletion after delay seconds"""
+    schedule_job_at(time.monotonic() + delay, delete_video_message, chat_id, message_id)
+
+
+def send_auto_delete_video(chat_id, file_id, caption):
+    """Send a video by file_id and queue it for deletion"""
+    sent_message = bot.send_video(chat_id,
+                                  file_id,
+                                  caption=caption,
+                                  supports_streaming=True,
+                                  parse_mode='MarkdownV2')
+    schedule_message_deletion(chat_id, sent_message.message_id)
+
+
+def process_timer_jobs():
+    """Background function to hand scheduled jobs to api_pool once they are due"""
+    while True:
+        with timer_jobs_cv:
+            while True:
+                now = time.monotonic()
+                if timer_jobs and timer_jobs[0][0] <= now:
+                    break
+                timeout = timer_jobs[0][0] - now if timer_jobs else None
+                timer_jobs_cv.wait(timeout)
+            due = []
+            while timer_jobs and timer_jobs[0][0] <= now:
+                due.append(heapq.heappop(timer_jobs))
+        # The timer thread only keeps time; a slow ping or deletion never holds up later jobs
+        for _, _, func, args in due:
+            run_in_background(func, *args)
 
 
 def delete_video_message(chat_id, message_id):
-    """Function to be run in a separate thread to delete a message after 20 minutes"""
-    time.sleep(1200)  # 20 minutes * 60 seconds = 1200 seconds
+    """Delete a sent video message"""
     try:
         bot.delete_message(chat_id, message_id)
-        print(
+        logger.info(
             f"✅ Message {message_id} in chat {chat_id} deleted successfully.")
     except Exception as e:
-        print(
+        logger.error(
             f"❌ Failed to delete message {message_id} in chat {chat_id}: {e}")
 
 
+@functools.lru_cache(maxsize=32)
+def normalize_channel(target_channel):
+    """Turn a stored channel name into a chat ID usable by the Bot API"""
+    if target_channel.startswith('@'):
+        return target_channel
+    if target_channel.startswith('-'):
+        return int(target_channel)  # Numeric chat ID
+    return f'@{target_channel}'
+
+
+# Channel-broadcast targets by callback_data: (display name, configured
+# channel, Bot API chat ID), resolved once instead of on every broadcast
+BROADCAST_TARGETS = {
+    f"broadcast_channel_{number}": (f"Channel {number}", channel,
+                                    normalize_channel(channel))
+    for number, channel in ((1, CHANNEL_1), (2, CHANNEL_2)) if channel
+}
+
+
 def process_scheduled_broadcasts():
     """Background function to process scheduled broadcasts"""
+    idle_polls = 0
     while True:
         try:
             pending_broadcasts = db.get_pending_broadcasts()
+            # Back off 60s -> 120s -> ... -> 300s while nothing is due;
+            # add_scheduled_broadcast wakes us early, so idle polls are only a safety net
+            idle_polls = 0 if pending_broadcasts else min(idle_polls + 1, 5)
+            max_sleep = min(BROADCAST_POLL_INTERVAL * max(idle_polls, 1), BROADCAST_MAX_POLL_INTERVAL)
 
             for broadcast in pending_broadcasts:
                 try:
@@ -145,13 +454,7 @@ def process_scheduled_broadcasts():
                     content_type = broadcast['content_type']
                     media_file_id = broadcast['media_file_id']
 
-                    # Normalize channel identifier
-                    if target_channel.startswith('@'):
-                        channel_id = target_channel
-                    elif target_channel.startswith('-'):
-                        channel_id = int(target_channel)
-                    else:
-                        channel_id = f'@{target_channel}'
+                    channel_id = normalize_channel(target_channel)
 
                     # Send the broadcast
                     if content_type == 'photo' and media_file_id:
@@ -170,7 +473,7 @@ def process_scheduled_broadcasts():
                     db.log_user_activity(
                         broadcast['admin_id'], "scheduled_broadcast_sent",
                         f"Scheduled broadcast sent to {target_channel}")
-                    print(
+                    logger.info(
                         f"✅ Scheduled broadcast {broadcast['id']} sent successfully to {target_channel}"
                     )
 
@@ -181,65 +484,59 @@ def process_scheduled_broadcasts():
                     db.log_user_activity(
                         broadcast['admin_id'], "scheduled_broadcast_failed",
                         f"Failed to send to {target}: {str(e)}")
-                    print(
+                    logger.error(
                         f"❌ Failed to send scheduled broadcast {broadcast['id']}: {e}"
                     )
 
-            # Sleep for 60 seconds before checking again
-            time.sleep(60)
+            # Sleep until the next broadcast is due (at most max_sleep) or a new one is scheduled
+            delay = db.seconds_until_next_broadcast()
+            db.wait_for_broadcasts(max_sleep if delay is None else min(max(delay, 1), max_sleep))
 
         except Exception as e:
-            print(f"❌ Error in scheduled broadcast processor: {e}")
+            logger.error(f"❌ Error in scheduled broadcast processor: {e}")
             time.sleep(60)
 
 
+def is_channel_member(channel, user_id):
+    """Check membership in one channel, served from membership_cache when fresh"""
+    key = (channel, user_id)
+    is_member = membership_cache.get(key)
+    if is_member is None:
+        status = bot.get_chat_member(channel, user_id).status
+        is_member = status in MEMBER_STATUSES
+        membership_cache.set(
+            key, is_member,
+            ttl=MEMBERSHIP_CACHE_TTL if is_member else NON_MEMBER_CACHE_TTL)
+    return is_member
+
+
+def forget_channel_membership(user_id):
+    """Drop cached "not a member" results so the next check asks Telegram again"""
+    # Confirmed memberships stay cached, so a retry only re-queries the
+    # channels the user had not joined yet
+    for channel in REQUIRED_CHANNELS:
+        key = (channel, user_id)
+        if membership_cache.get(key) is False:
+            membership_cache.pop(key)
+
+
 def check_channel_membership(user_id):
     """Check if user is a member of required channels"""
+    if user_id in ADMIN_IDS:
+        return True  # Staff are never gated on channel membership
     try:
-        if CHANNEL_1:
-            # Ensure channel name has @ prefix
-            channel_1 = CHANNEL_1 if CHANNEL_1.startswith(
-                '@') else f'@{CHANNEL_1}'
-            print(
-                f"Checking membership for user {user_id} in channel {channel_1}"
-            )
-            status = bot.get_chat_member(channel_1, user_id).status
-            print(f"User {user_id} status in {channel_1}: {status}")
-            if status not in ['member', 'administrator', 'creator']:
-                return False
-        if CHANNEL_2:
-            # Ensure channel name has @ prefix
-            channel_2 = CHANNEL_2 if CHANNEL_2.startswith(
-                '@') else f'@{CHANNEL_2}'
-            print(
-                f"Checking membership for user {user_id} in channel {channel_2}"
-            )
-            status = bot.get_chat_member(channel_2, user_id).status
-            print(f"User {user_id} status in {channel_2}: {status}")
-            if status not in ['member', 'administrator', 'creator']:
-                return False
-        return True
+        return all(
+            is_channel_member(channel, user_id)
+            for channel in REQUIRED_CHANNELS)
     except Exception as e:
-        print(f"Error checking membership for user {user_id}: {e}")
+        logger.error(f"Error checking membership for user {user_id}: {e}")
         return False
 
 
 def prompt_join_channels(chat_id, user_id, callback_data):
     """Prompt user to join channels with buttons"""
     keyboard = types.InlineKeyboardMarkup()
-
-    if CHANNEL_1:
-        channel1_clean = CHANNEL_1.lstrip('@')
-        channel1_url = f"https://t.me/{channel1_clean}"
-        keyboard.add(
-            types.InlineKeyboardButton("📢 Join Channel 1", url=channel1_url))
-
-    if CHANNEL_2:
-        channel2_clean = CHANNEL_2.lstrip('@')
-        channel2_url = f"https://t.me/{channel2_clean}"
-        keyboard.add(
-            types.InlineKeyboardButton("📢 Join Channel 2", url=channel2_url))
-
+    keyboard.keyboard = [[button] for button in JOIN_CHANNEL_BUTTONS]
     keyboard.add(
         types.InlineKeyboardButton("✅ I've Joined Both Channels",
                                    callback_data=callback_data))
@@ -274,14 +571,8 @@ def start_command(message):
             # Log video view for analytics
             db.log_video_view(video_id, user_id)
 
-            caption_text = f"🎥 *{escape_markdown_v2(video['name'])}*\n\n{escape_markdown_v2(video['description'])}"
-            sent_message = bot.send_video(chat_id,
-                                          video['file_id'],
-                                          caption=caption_text,
-                                          supports_streaming=True,
-                                          parse_mode='MarkdownV2')
-            threading.Thread(target=delete_video_message,
-                             args=(chat_id, sent_message.message_id)).start()
+            caption_text = video_caption(video['name'], video['description'])
+            send_auto_delete_video(chat_id, video['file_id'], caption_text)
         else:
             bot.reply_to(
                 message,
@@ -322,7 +613,7 @@ def join_access_command(message):
 
     join_access_enabled = not join_access_enabled
     status = "enabled" if join_access_enabled else "disabled"
-    print(
+    logger.info(
         f"📢 Channel join requirement is now {status} by owner {message.from_user.id}"
     )
     bot.reply_to(
@@ -331,6 +622,58 @@ def join_access_command(message):
         parse_mode='MarkdownV2')
 
 
+# Browse and search results are sent a page at a time, with ◀️/▶️ buttons for the rest
+RESULTS_PAGE_SIZE = 10
+# Telegram rejects callback_data longer than this many bytes
+CALLBACK_DATA_LIMIT = 64
+
+
+def video_results_keyboard(videos, page, total, page_callback):
+    """Keyboard of video buttons plus previous/next buttons; page_callback(page) gives their data"""
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    for video in videos:
+        keyboard.add(
+            types.InlineKeyboardButton(video['name'],
+                                       callback_data=f"video_{video['id']}"))
+    nav = []
+    if page > 0:
+        nav.append(types.InlineKeyboardButton("◀️ Previous", callback_data=page_callback(page - 1)))
+    if (page + 1) * RESULTS_PAGE_SIZE < total:
+        nav.append(types.InlineKeyboardButton("Next ▶️", callback_data=page_callback(page + 1)))
+    nav = [button for button in nav if len(button.callback_data.encode()) <= CALLBACK_DATA_LIMIT]
+    if nav:
+        keyboard.row(*nav)
+    return keyboard
+
+
+def render_browse_listing(page=0):
+    """Return (text, keyboard) for one page of videos, newest first, or None if there are none"""
+    return browse_listing(page, db.videos_version)
+
+
+@functools.lru_cache(maxsize=8)
+def browse_listing(page, video_version):
+    """Build a browse page once per catalogue version and share it across requests"""
+    with db.connection():
+        video_count = db.get_video_count()
+        videos = db.get_videos_page(page * RESULTS_PAGE_SIZE, RESULTS_PAGE_SIZE) if video_count else []
+    if not videos:
+        return None
+    keyboard = video_results_keyboard(videos, page, video_count, lambda p: f"browse_p{p}")
+    return f"📹 Available videos \\({video_count} total\\)\\:", keyboard
+
+
+def render_search_results(query, page=0):
+    """Return (text, keyboard) for one page of search results, or None if nothing matched"""
+    videos = db.search_videos(query)
+    if not videos:
+        return None
+    start = page * RESULTS_PAGE_SIZE
+    keyboard = video_results_keyboard(videos[start:start + RESULTS_PAGE_SIZE], page, len(videos),
+                                      lambda p: f"find_p{p}_{query}")
+    return f"🔍 Found {len(videos)} results for '`{escape_markdown_v2(query)}`'\\:", keyboard
+
+
 @bot.message_handler(commands=['browse'])
 def browse_command(message):
     """List all videos with pagination"""
@@ -348,21 +691,16 @@ def browse_command(message):
         prompt_join_channels(chat_id, user_id, "retry_browse")
         return
 
-    videos = db.get_all_videos()
-    if not videos:
+    listing = render_browse_listing()
+    if listing is None:
         bot.reply_to(message,
                      "📪 No videos available\\.",
                      parse_mode='MarkdownV2')
         return
 
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    for video in videos[:20]:  # Show up to 20 videos
-        keyboard.add(
-            types.InlineKeyboardButton(video['name'],
-                                       callback_data=f"video_{video['id']}"))
-
+    text, keyboard = listing
     bot.send_message(chat_id,
-                     f"📹 Available videos \\({len(videos)} total\\)\\:",
+                     text,
                      reply_markup=keyboard,
                      parse_mode='MarkdownV2')
 
@@ -389,14 +727,8 @@ def random_command(message):
         # Log video view for analytics
         db.log_video_view(video['id'], user_id)
 
-        caption_text = f"🎲 Random video: {escape_markdown_v2(video['name'])}\n\n{escape_markdown_v2(video['description'])}"
-        sent_message = bot.send_video(chat_id,
-                                      video['file_id'],
-                                      caption=caption_text,
-                                      supports_streaming=True,
-                                      parse_mode='MarkdownV2')
-        threading.Thread(target=delete_video_message,
-                         args=(chat_id, sent_message.message_id)).start()
+        caption_text = video_caption(video['name'], video['description'], random_pick=True)
+        send_auto_delete_video(chat_id, video['file_id'], caption_text)
     else:
         bot.reply_to(message,
                      "📪 No videos available\\.",
@@ -411,8 +743,6 @@ def search_command(message):
     username = message.from_user.username
     first_name = message.from_user.first_name
 
-    is_admin = user_id in ADMINS or user_id == OWNER
-
     query = ' '.join(message.text.split()[1:])
     if not query:
         bot.reply_to(
@@ -426,28 +756,19 @@ def search_command(message):
         send_banned_message(message)
         return
 
-    if join_access_enabled and not is_admin and not check_channel_membership(
+    if join_access_enabled and not check_channel_membership(
             user_id):
         prompt_join_channels(chat_id, user_id, f"retry_find_{query}")
         return
 
-    videos = db.search_videos(query)
-    count = len(videos)
-
-    if not videos:
+    results = render_search_results(query)
+    if results is None:
         bot.reply_to(message,
                      "❌ No videos found matching your query\\.",
                      parse_mode='MarkdownV2')
         return
 
-    response_text = f"🔍 Found {count} results for '`{escape_markdown_v2(query)}`':"
-
-    keyboard = types.InlineKeyboardMarkup(row_width=2)
-    for video in videos[:20]:  # Show up to 20 results
-        keyboard.add(
-            types.InlineKeyboardButton(video['name'],
-                                       callback_data=f"video_{video['id']}"))
-
+    response_text, keyboard = results
     bot.send_message(chat_id,
                      response_text,
                      reply_markup=keyboard,
@@ -457,7 +778,7 @@ def search_command(message):
 @bot.message_handler(commands=['delete'])
 def delete_command(message):
     """Delete a video by ID (owner/admins only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 Only admins can delete videos\\.",
                      parse_mode='MarkdownV2')
@@ -485,30 +806,35 @@ def delete_command(message):
 @bot.message_handler(commands=['database'])
 def database_command(message):
     """Provide admins with database stats and a list of videos"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
         return
 
-    videos = db.get_all_videos()
-    if not videos:
+    video_count = db.get_video_count()
+    if not video_count:
         bot.reply_to(message,
                      "📪 The database is empty\\.",
                      parse_mode='MarkdownV2')
         return
 
-    stats_text = f"**Database Stats**\nTotal Videos: {len(videos)}\n\n"
-    for video in videos:
-        stats_text += f"ID: `{video['id']}` \\- {escape_markdown_v2(video['name'])}\n"
+    # Rows are streamed straight into the message chunks instead of a full video list
+    lines = itertools.chain(
+        ["**Database Stats**", f"Total Videos: {video_count}", ""],
+        (f"ID: `{video['id']}` \\- {escape_markdown_v2(video['name'])}"
+         for video in db.iter_all_videos()))
 
-    bot.reply_to(message, stats_text, parse_mode='MarkdownV2')
+    chunks = split_message_lines(lines)
+    bot.reply_to(message, chunks[0], parse_mode='MarkdownV2')
+    for chunk in chunks[1:]:
+        bot.send_message(message.chat.id, chunk, parse_mode='MarkdownV2')
 
 
 @bot.message_handler(commands=['help'])
 def help_command(message):
     """Display help message for admins"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -550,24 +876,26 @@ def help_command(message):
     bot.reply_to(message, help_text, parse_mode='MarkdownV2')
 
 
-@bot.message_handler(commands=['admin'])
-def admin_list_command(message):
-    """List admins and owner"""
-    admin_usernames = []
-    for admin_id in ADMINS:
+def get_username(user_id):
+    """Resolve a user's @username (or their ID if they have none), cached for an hour"""
+    username = username_cache.get(user_id)
+    if username is None:
         try:
-            user = bot.get_chat(admin_id)
-            username = user.username if user.username else str(admin_id)
-            admin_usernames.append(username)
+            user = bot.get_chat(user_id)
         except Exception:
-            admin_usernames.append(str(admin_id))
+            return str(user_id)  # Not cached, so the next call retries
+        username = user.username if user.username else str(user_id)
+        username_cache.set(user_id, username)
+    return username
 
-    try:
-        owner_user = bot.get_chat(OWNER)
-        owner_username = owner_user.username if owner_user.username else str(
-            OWNER)
-    except Exception:
-        owner_username = str(OWNER)
+
+@bot.message_handler(commands=['admin'])
+def admin_list_command(message):
+    """List admins and owner"""
+    # Resolve everyone concurrently: one round-trip of latency instead of one per admin
+    staff_ids = [OWNER] + ADMINS
+    with ThreadPoolExecutor(max_workers=min(8, len(staff_ids))) as pool:
+        owner_username, *admin_usernames = pool.map(get_username, staff_ids)
 
     # Escape usernames for MarkdownV2
     escaped_owner_username = escape_markdown_v2(owner_username)
@@ -582,6 +910,40 @@ def admin_list_command(message):
     bot.reply_to(message, response_text, parse_mode='MarkdownV2')
 
 
+def fan_out_to_users(users, action):
+    """Call action(user_id) per user on a rate-limited pool; returns (attempted, succeeded)"""
+    bucket = TokenBucket(BROADCAST_RATE)
+
+    def run(user_id):
+        bucket.acquire()
+        return action(user_id)
+
+    attempted = succeeded = 0
+    chunk = []
+    with ThreadPoolExecutor(max_workers=BROADCAST_WORKERS) as pool:
+        # Work a chunk at a time so in-flight futures stay bounded
+        for user in users:
+            chunk.append(user['user_id'])
+            if len(chunk) >= BROADCAST_CHUNK_SIZE:
+                succeeded += sum(map(bool, pool.map(run, chunk)))
+                attempted += len(chunk)
+                chunk = []
+        succeeded += sum(map(bool, pool.map(run, chunk)))
+        attempted += len(chunk)
+    return attempted, succeeded
+
+
+# Flood-limited (429) cleanup probes are retried after Telegram's retry_after this many times
+PROBE_MAX_ATTEMPTS = 3
+
+
+def is_unreachable_user_error(e):
+    """Whether an API error means the user is gone for good: bot blocked, deactivated or unknown chat"""
+    if e.error_code == 403:
+        return True
+    return e.error_code == 400 and 'chat not found' in (e.description or '').lower()
+
+
 @bot.message_handler(commands=['broadcast'])
 def broadcast_command(message):
     """Send a message to all tracked users (owner only)"""
@@ -598,20 +960,26 @@ def broadcast_command(message):
                      parse_mode='MarkdownV2')
         return
 
-    users = db.get_active_users()  # Only get non-banned users
-    sent_count = 0
-    for user in users:
+    unreachable = []
+
+    def send_one(user_id):
         try:
-            bot.send_message(user['user_id'], text_to_broadcast)
-            sent_count += 1
-            time.sleep(0.1)  # Small delay to avoid rate limiting
+            bot.send_message(user_id, text_to_broadcast)
+            return True
         except ApiTelegramException as e:
-            if e.description == "Forbidden: bot was blocked by the user":
-                db.remove_user(user['user_id'])
+            if is_unreachable_user_error(e):
+                unreachable.append(user_id)
             else:
-                print(f"Failed to send message to {user['user_id']}: {e}")
+                logger.error(f"Failed to send message to {user_id}: {e}")
+            return False
+
+    # Only non-banned users, fetched page by page
+    total_active, sent_count = fan_out_to_users(
+        db.iter_users_paged(active_only=True), send_one)
+
+    # Drop everyone the cleanup probe would also drop, in one batch after the sends
+    db.remove_users_bulk(unreachable)
 
-    total_active = len(users)
     bot.reply_to(
         message,
         f"✅ Broadcast sent to {sent_count}/{total_active} active users\\.",
@@ -621,13 +989,13 @@ def broadcast_command(message):
 @bot.message_handler(commands=['channel_broadcast'])
 def channel_broadcast_command(message):
     """Start channel broadcasting process (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 Only admins can broadcast to channels\\.",
                      parse_mode='MarkdownV2')
         return
 
-    if not CHANNEL_1 and not CHANNEL_2:
+    if not REQUIRED_CHANNELS:
         bot.reply_to(
             message,
             "❌ No channels configured\\. Please set CHANNEL\\_1 and/or CHANNEL\\_2 environment variables\\.",
@@ -635,45 +1003,29 @@ def channel_broadcast_command(message):
         return
 
     user_id = message.from_user.id
-    user_states[user_id] = {
+    user_states.set(user_id, {
         'state': BROADCAST_STATES['AWAITING_CHANNEL'],
         'broadcast_type': 'channel'
-    }
-
-    keyboard = types.InlineKeyboardMarkup()
-
-    if CHANNEL_1:
-        keyboard.add(
-            types.InlineKeyboardButton(f"📢 Channel 1 ({CHANNEL_1})",
-                                       callback_data="broadcast_channel_1"))
-    if CHANNEL_2:
-        keyboard.add(
-            types.InlineKeyboardButton(f"📢 Channel 2 ({CHANNEL_2})",
-                                       callback_data="broadcast_channel_2"))
-
-    keyboard.add(
-        types.InlineKeyboardButton("❌ Cancel",
-                                   callback_data="broadcast_cancel"))
+    })
 
     bot.send_message(
         message.chat.id,
-        "📢 **Channel Broadcast**\n\nSelect which channel to broadcast to:",
-        reply_markup=keyboard,
+        CHANNEL_BROADCAST_PROMPT,
+        reply_markup=CHANNEL_BROADCAST_KEYBOARD,
         parse_mode='MarkdownV2')
 
 
 @bot.message_handler(commands=['analytics'])
 def analytics_command(message):
     """Show video analytics (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
         return
 
     # Get analytics summary
-    summary = db.get_analytics_summary()
-    popular_videos = db.get_popular_videos(5)
+    summary, popular_videos = db.get_analytics_bundle(5)
 
     analytics_text = f"""📊 **Video Analytics Summary**
 
@@ -685,29 +1037,22 @@ def analytics_command(message):
 🔥 **Most Popular Videos:**"""
 
     for i, video in enumerate(popular_videos[:5], 1):
-        video_name = escape_markdown_v2(video['name'][:30] +
-                                        "..." if len(video['name']) >
-                                        30 else video['name'])
+        video_name = truncate_markdown_v2(video['name'])
         analytics_text += f"\n{i}\\. {video_name} \\- {video['view_count']} views"
 
     if not popular_videos:
         analytics_text += "\nNo video views recorded yet\\."
 
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(
-        types.InlineKeyboardButton("📊 Detailed Analytics",
-                                   callback_data="analytics_detailed"))
-
     bot.send_message(message.chat.id,
                      analytics_text,
-                     reply_markup=keyboard,
+                     reply_markup=ANALYTICS_KEYBOARD,
                      parse_mode='MarkdownV2')
 
 
 @bot.message_handler(commands=['templates'])
 def templates_command(message):
     """Manage message templates (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -716,20 +1061,15 @@ def templates_command(message):
     templates = db.get_templates()
 
     if not templates:
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("➕ Create Template",
-                                       callback_data="template_create"))
         bot.send_message(message.chat.id,
                          "📝 **Message Templates**\n\nNo templates found\\.",
-                         reply_markup=keyboard,
+                         reply_markup=CREATE_TEMPLATE_KEYBOARD,
                          parse_mode='MarkdownV2')
         return
 
     keyboard = types.InlineKeyboardMarkup(row_width=1)
     for template in templates[:10]:  # Show first 10 templates
-        template_name = template['name'][:25] + "..." if len(
-            template['name']) > 25 else template['name']
+        template_name = truncate(template['name'], 25)
         keyboard.add(
             types.InlineKeyboardButton(
                 f"📝 {template_name}",
@@ -749,46 +1089,33 @@ def templates_command(message):
 @bot.message_handler(commands=['schedule'])
 def schedule_command(message):
     """Schedule broadcasts (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
         return
 
-    if not CHANNEL_1 and not CHANNEL_2:
+    if not REQUIRED_CHANNELS:
         bot.reply_to(message,
                      "❌ No channels configured for scheduling\\.",
                      parse_mode='MarkdownV2')
         return
 
     user_id = message.from_user.id
-    scheduled_broadcasts = db.get_scheduled_broadcasts(user_id)
-
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(
-        types.InlineKeyboardButton("➕ Schedule New Broadcast",
-                                   callback_data="schedule_new"))
-
-    if scheduled_broadcasts:
-        keyboard.add(
-            types.InlineKeyboardButton("📋 View Scheduled",
-                                       callback_data="schedule_view"))
-
-    pending_count = len(
-        [b for b in scheduled_broadcasts if b['status'] == 'pending'])
+    counts = db.get_scheduled_counts(user_id)
 
     schedule_text = f"""⏰ **Scheduled Broadcasts**
 
 📊 **Your Schedules:**
-\\• Total: {len(scheduled_broadcasts)}
-\\• Pending: {pending_count}
-\\• Completed: {len(scheduled_broadcasts) - pending_count}
+\\• Total: {counts['total']}
+\\• Pending: {counts['pending']}
+\\• Completed: {counts['total'] - counts['pending']}
 
 Select an action:"""
 
     bot.send_message(message.chat.id,
                      schedule_text,
-                     reply_markup=keyboard,
+                     reply_markup=SCHEDULE_KEYBOARDS[bool(counts['total'])],
                      parse_mode='MarkdownV2')
 
 
@@ -798,36 +1125,30 @@ Select an action:"""
 @bot.message_handler(commands=['stats'])
 def admin_stats_command(message):
     """Show comprehensive bot statistics (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
         return
 
     # Get statistics
-    user_count = db.get_user_count()
-    video_count = db.get_video_count()
-    video_stats = db.get_video_stats()
-    recent_videos = db.get_recent_videos(3)
+    counts, recent_videos = run_concurrently(db.get_dashboard_counts,
+                                             lambda: db.get_recent_videos(3))
 
-    # Bot info
-    bot_info = bot.get_me()
     join_status = "enabled" if join_access_enabled else "disabled"
 
     stats_text = f"""📊 **Bot Statistics**
 
-👥 **Users:** {user_count} registered
-🎥 **Videos:** {video_count} total
-📝 **With Descriptions:** {video_stats['with_description']}/{video_stats['total']}
+👥 **Users:** {counts['users']} registered
+🎥 **Videos:** {counts['videos']} total
+📝 **With Descriptions:** {counts['videos_with_description']}/{counts['videos']}
 🔧 **Channel Join:** {join_status}
-🤖 **Bot:** @{escape_markdown_v2(bot_info.username)}
+🤖 **Bot:** @{escape_markdown_v2(get_bot_username())}
 
 📋 **Recent Videos:**"""
 
     for video in recent_videos:
-        video_name = escape_markdown_v2(video['name'][:30] +
-                                        "..." if len(video['name']) >
-                                        30 else video['name'])
+        video_name = truncate_markdown_v2(video['name'])
         stats_text += f"\n\\• {video_name}"
 
     if not recent_videos:
@@ -836,24 +1157,8 @@ def admin_stats_command(message):
     bot.reply_to(message, stats_text, parse_mode='MarkdownV2')
 
 
-@bot.message_handler(commands=['admin_panel'])
-def admin_panel_command(message):
-    """Show admin control panel with buttons (admin only)"""
-    user_id = message.from_user.id
-
-    # Log admin activity
-    try:
-        db.log_user_activity(user_id, "admin_panel",
-                             "Accessed admin control panel")
-    except Exception as e:
-        print(f"Failed to log admin activity: {e}")
-
-    if user_id not in ADMINS and user_id != OWNER:
-        bot.reply_to(message,
-                     "🚫 This command is for admins only\\.",
-                     parse_mode='MarkdownV2')
-        return
-
+def build_admin_panel_keyboard(include_owner):
+    """Build the admin control panel keyboard (owner-only maintenance row optional)"""
     keyboard = types.InlineKeyboardMarkup(row_width=2)
 
     # Statistics and Info
@@ -897,13 +1202,101 @@ def admin_panel_command(message):
                                    callback_data="admin_bulk"))
 
     # Maintenance (Owner only)
-    if message.from_user.id == OWNER:
+    if include_owner:
         keyboard.add(
             types.InlineKeyboardButton("🗄️ Database",
                                        callback_data="admin_database"),
             types.InlineKeyboardButton("⚠️ Cleanup",
                                        callback_data="admin_cleanup"))
 
+    return keyboard
+
+
+# The panel is static, so both variants are built once and shared by every render
+ADMIN_PANEL_KEYBOARD = build_admin_panel_keyboard(include_owner=False)
+ADMIN_PANEL_KEYBOARD_OWNER = build_admin_panel_keyboard(include_owner=True)
+
+
+def build_keyboard(*rows):
+    """Build an inline keyboard from rows of (text, callback_data) pairs"""
+    keyboard = types.InlineKeyboardMarkup()
+    for row in rows:
+        keyboard.add(*(types.InlineKeyboardButton(text, callback_data=data)
+                       for text, data in row))
+    return keyboard
+
+
+# Static keyboards, built once at import instead of on every command or click
+BACK_TO_PANEL = ("⬅️ Back to Panel", "admin_panel_main")
+CHANNEL_BROADCAST_ROWS = tuple(
+    [(f"📢 Channel {number} ({channel})", f"broadcast_channel_{number}")]
+    for number, channel in ((1, CHANNEL_1), (2, CHANNEL_2)) if channel)
+CHANNEL_BROADCAST_KEYBOARD = build_keyboard(
+    *CHANNEL_BROADCAST_ROWS, [("❌ Cancel", "broadcast_cancel")])
+ADMIN_CHANNEL_BROADCAST_KEYBOARD = build_keyboard(*CHANNEL_BROADCAST_ROWS,
+                                                  [BACK_TO_PANEL])
+CANCEL_BROADCAST_KEYBOARD = build_keyboard(
+    [("❌ Cancel Broadcast", "broadcast_cancel")])
+ANALYTICS_KEYBOARD = build_keyboard(
+    [("📊 Detailed Analytics", "analytics_detailed")])
+ADMIN_ANALYTICS_KEYBOARD = build_keyboard(
+    [("📊 Detailed Analytics", "analytics_detailed")], [BACK_TO_PANEL])
+CREATE_TEMPLATE_KEYBOARD = build_keyboard(
+    [("➕ Create Template", "template_create")])
+# Keyed on whether the admin has any schedules to view
+SCHEDULE_KEYBOARDS = {
+    False: build_keyboard([("➕ Schedule New Broadcast", "schedule_new")]),
+    True: build_keyboard([("➕ Schedule New Broadcast", "schedule_new")],
+                         [("📋 View Scheduled", "schedule_view")]),
+}
+ADMIN_SCHEDULE_KEYBOARDS = {
+    False: build_keyboard([("➕ Schedule New", "schedule_new")],
+                          [BACK_TO_PANEL]),
+    True: build_keyboard([("➕ Schedule New", "schedule_new")],
+                         [("📋 View All", "schedule_view")], [BACK_TO_PANEL]),
+}
+ADMIN_BULK_KEYBOARD = build_keyboard(
+    [("🗑️ Bulk Delete Videos", "bulk_delete_videos"),
+     ("🚫 Bulk Ban Users", "bulk_ban_users")],
+    [("📊 Export Data", "bulk_export"), ("🧹 Clean Database", "bulk_clean")],
+    [BACK_TO_PANEL])
+CONFIRM_BULK_DELETE_KEYBOARD = build_keyboard(
+    [("✅ Yes, Delete ALL", "confirm_bulk_delete_all"),
+     ("❌ Cancel", "admin_bulk")])
+BACK_TO_ADMIN_PANEL_KEYBOARD = build_keyboard(
+    [("⬅️ Back to Admin Panel", "admin_panel_main")])
+
+
+@functools.lru_cache(maxsize=1024)
+def video_actions_keyboard(video_id):
+    """Preview/delete keyboard for one video, cached per video id"""
+    return build_keyboard(
+        [("🎬 Preview", f"preview_video_{video_id}"),
+         ("🗑️ Delete", f"delete_video_{video_id}")],
+        [("⬅️ Back", "admin_videos")])
+
+
+@bot.message_handler(commands=['admin_panel'])
+def admin_panel_command(message):
+    """Show admin control panel with buttons (admin only)"""
+    user_id = message.from_user.id
+
+    # Log admin activity
+    try:
+        db.log_user_activity(user_id, "admin_panel",
+                             "Accessed admin control panel")
+    except Exception as e:
+        logger.error(f"Failed to log admin activity: {e}")
+
+    if user_id not in ADMIN_IDS:
+        bot.reply_to(message,
+                     "🚫 This command is for admins only\\.",
+                     parse_mode='MarkdownV2')
+        return
+
+    keyboard = (ADMIN_PANEL_KEYBOARD_OWNER if user_id == OWNER
+                else ADMIN_PANEL_KEYBOARD)
+
     bot.send_message(message.chat.id,
                      "🎛️ **Admin Control Panel**\n\nSelect an option:",
                      reply_markup=keyboard,
@@ -919,21 +1312,36 @@ def cleanup_users_command(message):
                      parse_mode='MarkdownV2')
         return
 
-    users = db.get_all_users()
-    removed_count = 0
-
     bot.reply_to(message,
-                 f"🧹 Starting cleanup of {len(users)} users\\.\\.\\.",
+                 f"🧹 Starting cleanup of {db.get_user_count()} users\\.\\.\\.",
                  parse_mode='MarkdownV2')
 
-    for user in users:
-        try:
-            # Try to send a test message (this will fail if user blocked the bot)
-            bot.send_chat_action(user['user_id'], 'typing')
-            time.sleep(0.1)
-        except ApiTelegramException:
-            db.remove_user(user['user_id'])
-            removed_count += 1
+    unreachable = []
+
+    def probe(user_id):
+        # Only a definitive 403/400 marks a user for removal; flood limits are retried and
+        # any other failure (5xx, network) keeps the user
+        for _ in range(PROBE_MAX_ATTEMPTS):
+            try:
+                # Try to send a test message (this will fail if user blocked the bot)
+                bot.send_chat_action(user_id, 'typing')
+                return True
+            except ApiTelegramException as e:
+                if is_unreachable_user_error(e):
+                    unreachable.append(user_id)
+                    return False
+                if e.error_code != 429:
+                    return False
+                retry_after = ((e.result_json or {}).get('parameters') or {}).get('retry_after', 1)
+                time.sleep(retry_after)
+            except Exception as e:
+                logger.warning(f"⚠️ Cleanup probe for {user_id} failed: {e}")
+                return False
+        return False
+
+    fan_out_to_users(db.iter_users_paged(), probe)
+    # One transaction for every removal instead of a commit per user
+    removed_count = db.remove_users_bulk(unreachable)
 
     bot.reply_to(
         message,
@@ -944,94 +1352,125 @@ def cleanup_users_command(message):
 @bot.message_handler(commands=['system_info'])
 def system_info_command(message):
     """Show detailed system information (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
         return
 
-    import sys
-    import platform
-
-    # System info
-    python_version = f"{sys.version_info.major}\\.{sys.version_info.minor}\\.{sys.version_info.micro}"
-    platform_info = escape_markdown_v2(platform.platform())
-
     # Bot uptime calculation
     uptime = datetime.now() - bot_start_time
     uptime_str = f"{uptime.days}d {uptime.seconds//3600}h {(uptime.seconds//60)%60}m"
     current_time = datetime.now().strftime("%Y\\-%m\\-%d %H:%M")
 
     # Database stats
-    user_count = db.get_user_count()
-    video_count = db.get_video_count()
+    counts = db.get_dashboard_counts()
 
     system_text = f"""🖥️ **System Information**
 
-🐍 **Python:** {python_version}
-💻 **Platform:** {platform_info}
+🐍 **Python:** {PYTHON_VERSION_MD}
+💻 **Platform:** {PLATFORM_MD}
 ⏰ **Current Time:** {current_time}
 ⏱️ **Uptime:** {uptime_str}
 
 📊 **Database:**
-\\• Users: {user_count}
-\\• Videos: {video_count}
+\\• Users: {counts['users']}
+\\• Videos: {counts['videos']}
 
 🤖 **Bot Configuration:**
 \\• Owner: {OWNER}
 \\• Admins: {len(ADMINS)}
-\\• Channels: {len([c for c in [CHANNEL_1, CHANNEL_2] if c])}
+\\• Channels: {len(REQUIRED_CHANNELS)}
 \\• Join Requirement: {"✅" if join_access_enabled else "❌"}"""
 
     bot.reply_to(message, system_text, parse_mode='MarkdownV2')
 
 
-@bot.message_handler(commands=['video_manage'])
-def video_manage_command(message):
-    """Video management interface (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
-        bot.reply_to(message,
-                     "🚫 This command is for admins only\\.",
-                     parse_mode='MarkdownV2')
-        return
+# Videos per /video_manage page; pages 0-2 are reachable from the buttons
+VIDEO_PAGE_SIZE = 10
 
-    videos = db.get_all_videos()
-    if not videos:
-        bot.reply_to(message,
-                     "📪 No videos in database\\.",
-                     parse_mode='MarkdownV2')
-        return
 
+@functools.lru_cache(maxsize=8)
+def video_page_keyboard(page, video_version):
+    """Build the /video_manage keyboard for a page, cached until the catalogue changes"""
+    video_count = db.get_video_count()
     keyboard = types.InlineKeyboardMarkup(row_width=1)
 
-    # Show first 10 videos with management options
-    for video in videos[:10]:
-        video_name = video['name'][:25] + "..." if len(
-            video['name']) > 25 else video['name']
+    for video in db.get_videos_page(page * VIDEO_PAGE_SIZE, VIDEO_PAGE_SIZE):
+        video_name = truncate(video['name'], 25)
         keyboard.add(
             types.InlineKeyboardButton(
                 f"🎥 {video_name}",
                 callback_data=f"manage_video_{video['id']}"))
 
-    if len(videos) > 10:
+    if page == 0:
+        if video_count > 10:
+            keyboard.add(
+                types.InlineKeyboardButton("➡️ Show More",
+                                           callback_data="admin_videos_more"))
+    elif page == 1:
+        if video_count > 20:
+            keyboard.add(
+                types.InlineKeyboardButton("➡️ Show Even More",
+                                           callback_data="admin_videos_more2"))
+        keyboard.add(
+            types.InlineKeyboardButton("⬅️ Back to First 10",
+                                       callback_data="admin_videos"))
+    else:
         keyboard.add(
-            types.InlineKeyboardButton("➡️ Show More",
+            types.InlineKeyboardButton("⬅️ Back to Videos 11-20",
                                        callback_data="admin_videos_more"))
-
-    bot.send_message(
-        message.chat.id,
-        f"🎥 **Video Management** \\({len(videos)} total\\)\n\nSelect a video to manage:",
-        reply_markup=keyboard,
-        parse_mode='MarkdownV2')
+        keyboard.add(
+            types.InlineKeyboardButton("🏠 Back to Panel",
+                                       callback_data="admin_videos"))
+    return keyboard
 
 
-# ===== ENHANCED USER MANAGEMENT COMMANDS =====
+def render_video_page(page):
+    """Return (text, keyboard) for one page of the video management listing"""
+    with db.connection():
+        video_count = db.get_video_count()
+        keyboard = video_page_keyboard(page, db.videos_version)
+    if page == 0:
+        heading = f"{video_count} total"
+    elif page == 1:
+        heading = f"Videos 11\\-20 of {video_count}"
+    else:
+        heading = f"Videos 21\\+ of {video_count}"
+    text = f"🎥 **Video Management** \\({heading}\\)\n\nSelect a video to manage:"
+    return text, keyboard
 
 
-@bot.message_handler(commands=['ban_user'])
-def ban_user_command(message):
-    """Ban a user (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+@bot.message_handler(commands=['video_manage'])
+def video_manage_command(message):
+    """Video management interface (admin only)"""
+    if message.from_user.id not in ADMIN_IDS:
+        bot.reply_to(message,
+                     "🚫 This command is for admins only\\.",
+                     parse_mode='MarkdownV2')
+        return
+
+    video_count = db.get_video_count()
+    if not video_count:
+        bot.reply_to(message,
+                     "📪 No videos in database\\.",
+                     parse_mode='MarkdownV2')
+        return
+
+    videos_text, keyboard = render_video_page(0)
+    bot.send_message(message.chat.id,
+                     videos_text,
+                     reply_markup=keyboard,
+                     parse_mode='MarkdownV2')
+
+
+# ===== ENHANCED USER MANAGEMENT COMMANDS =====
+
+
+@bot.message_handler(commands=['ban_user'])
+def ban_user_command(message):
+    """Ban a user (admin only)"""
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1055,7 +1494,7 @@ def ban_user_command(message):
                          parse_mode='MarkdownV2')
             return
 
-        if user_id_to_ban in ADMINS:
+        if user_id_to_ban in ADMIN_IDS:
             bot.reply_to(message,
                          "❌ Cannot ban other admins\\.",
                          parse_mode='MarkdownV2')
@@ -1081,7 +1520,7 @@ def ban_user_command(message):
 @bot.message_handler(commands=['unban_user'])
 def unban_user_command(message):
     """Unban a user (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1117,7 +1556,7 @@ def unban_user_command(message):
 @bot.message_handler(commands=['banned_users'])
 def banned_users_command(message):
     """List all banned users (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1130,26 +1569,24 @@ def banned_users_command(message):
                      parse_mode='MarkdownV2')
         return
 
-    response_text = f"🚫 **Banned Users** \\({len(banned_users)} total\\)\n\n"
+    parts = [f"🚫 **Banned Users** \\({len(banned_users)} total\\)\n\n"]
     for user in banned_users[:10]:  # Show up to 10 banned users
         user_display = f"@{escape_markdown_v2(user['username'])}" if user[
             'username'] else f"{user['first_name'] or 'Unknown'}"
         banned_date = user['banned_at'][:10] if user['banned_at'] else 'Unknown'
-        reason = escape_markdown_v2(user['reason'][:30] +
-                                    "..." if len(user['reason']) >
-                                    30 else user['reason'])
-        response_text += f"• **{user_display}** \\(`{user['user_id']}`\\)\n  Banned: {banned_date} \\- {reason}\n\n"
+        reason = truncate_markdown_v2(user['reason'])
+        parts.append(f"• **{user_display}** \\(`{user['user_id']}`\\)\n  Banned: {banned_date} \\- {reason}\n\n")
 
     if len(banned_users) > 10:
-        response_text += f"\\.\\.\\. and {len(banned_users) - 10} more\\."
+        parts.append(f"\\.\\.\\. and {len(banned_users) - 10} more\\.")
 
-    bot.reply_to(message, response_text, parse_mode='MarkdownV2')
+    bot.reply_to(message, "".join(parts), parse_mode='MarkdownV2')
 
 
 @bot.message_handler(commands=['user_info'])
 def user_info_command(message):
     """Get detailed information about a user (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1187,7 +1624,7 @@ def user_info_command(message):
         last_activity = user['last_activity'][:16] if user[
             'last_activity'] else 'Unknown'
 
-        info_text = f"""👤 **User Information**
+        lines = [f"""👤 **User Information**
 
 **ID:** `{user['user_id']}`
 **Name:** {first_name}
@@ -1196,18 +1633,18 @@ def user_info_command(message):
 **Last Active:** {last_activity}
 **Status:** {"🚫 Banned" if is_banned else "✅ Active"}
 
-📋 **Recent Activity:**"""
+📋 **Recent Activity:**"""]
 
         for activity in recent_activity:
             action = escape_markdown_v2(activity['action'])
             timestamp = activity['timestamp'][:16] if activity[
                 'timestamp'] else 'Unknown'
-            info_text += f"\n• {action} \\- {timestamp}"
+            lines.append(f"• {action} \\- {timestamp}")
 
         if not recent_activity:
-            info_text += "\n• No recent activity"
+            lines.append("• No recent activity")
 
-        bot.reply_to(message, info_text, parse_mode='MarkdownV2')
+        bot.reply_to(message, "\n".join(lines), parse_mode='MarkdownV2')
 
     except ValueError:
         bot.reply_to(
@@ -1219,7 +1656,7 @@ def user_info_command(message):
 @bot.message_handler(commands=['search_users'])
 def search_users_command(message):
     """Search for users by username or name (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1241,7 +1678,7 @@ def search_users_command(message):
             parse_mode='MarkdownV2')
         return
 
-    response_text = f"🔍 **User Search Results** \\({len(users)} found\\)\n\n"
+    parts = [f"🔍 **User Search Results** \\({len(users)} found\\)\n\n"]
     for user in users[:10]:  # Show up to 10 results
         user_display = f"@{escape_markdown_v2(user['username'])}" if user[
             'username'] else "No username"
@@ -1249,20 +1686,20 @@ def search_users_command(message):
             user['first_name']) if user['first_name'] else "Unknown"
         last_active = user['last_activity'][:10] if user[
             'last_activity'] else 'Unknown'
-        is_banned = "🚫" if db.is_user_banned(user['user_id']) else "✅"
+        is_banned = "🚫" if user['is_banned'] else "✅"
 
-        response_text += f"• **{first_name}** {user_display} \\(`{user['user_id']}`\\)\n  Last active: {last_active} {is_banned}\n\n"
+        parts.append(f"• **{first_name}** {user_display} \\(`{user['user_id']}`\\)\n  Last active: {last_active} {is_banned}\n\n")
 
     if len(users) > 10:
-        response_text += f"\\.\\.\\. and {len(users) - 10} more results\\."
+        parts.append(f"\\.\\.\\. and {len(users) - 10} more results\\.")
 
-    bot.reply_to(message, response_text, parse_mode='MarkdownV2')
+    bot.reply_to(message, "".join(parts), parse_mode='MarkdownV2')
 
 
 @bot.message_handler(commands=['recent_activity'])
 def recent_activity_command(message):
     """Show recent user activity (admin only)"""
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 This command is for admins only\\.",
                      parse_mode='MarkdownV2')
@@ -1275,214 +1712,158 @@ def recent_activity_command(message):
                      parse_mode='MarkdownV2')
         return
 
-    response_text = f"📝 **Recent Activity** \\({len(activities)} events\\)\n\n"
+    parts = [f"📝 **Recent Activity** \\({len(activities)} events\\)\n\n"]
     for activity in activities:
         user_display = f"@{escape_markdown_v2(activity['username'])}" if activity[
             'username'] else f"{activity['first_name'] or 'Unknown'}"
         action = escape_markdown_v2(activity['action'])
         timestamp = activity['timestamp'][5:16] if activity[
             'timestamp'] else 'Unknown'
-        details = escape_markdown_v2(
-            activity['details'][:30] + "..." if len(activity['details']) >
-            30 else activity['details']) if activity['details'] else ""
+        details = truncate_markdown_v2(activity['details']) if activity['details'] else ""
 
-        response_text += f"• **{user_display}** \\- {action}\n  {timestamp}"
+        parts.append(f"• **{user_display}** \\- {action}\n  {timestamp}")
         if details:
-            response_text += f" \\- {details}"
-        response_text += "\n\n"
+            parts.append(f" \\- {details}")
+        parts.append("\n\n")
 
-    bot.reply_to(message, response_text, parse_mode='MarkdownV2')
+    bot.reply_to(message, "".join(parts), parse_mode='MarkdownV2')
 
 
-# Enhanced callback handler for admin features
-@bot.callback_query_handler(func=lambda call: call.data.startswith("admin_"))
-def admin_callback_handler(call):
-    """Handle admin panel callbacks"""
-    user_id = call.from_user.id
-    chat_id = call.message.chat.id
-    data = call.data
-
-    # Check admin permissions
-    if user_id not in ADMINS and user_id != OWNER:
-        bot.answer_callback_query(call.id,
-                                  "❌ Admin access required",
-                                  show_alert=True)
-        return
-
-    # Log admin activity
-    try:
-        db.log_user_activity(user_id, "admin_callback",
-                             f"Used admin panel: {data}")
-    except Exception as e:
-        print(f"Failed to log admin activity: {e}")
+# Admin panel bodies that depend only on configuration, rendered once at import
+ADMIN_PANEL_TEXT = """🎛️ **Admin Control Panel**
+        
+Welcome to the admin dashboard\\! Use the buttons below to manage the bot\\."""
+# Keyed on join_access_enabled, the only part of the settings panel that changes
+ADMIN_SETTINGS_TEXTS = {
+    enabled: f"""🔧 **Bot Settings**
+        
+Channel Join Requirement: {"✅ Enabled" if enabled else "❌ Disabled"}
+Configured Channels: {len(REQUIRED_CHANNELS)}
 
-    bot.answer_callback_query(call.id)
+Commands:
+\\• /join\\_access \\- Toggle channel requirement
+\\• /system\\_info \\- Detailed system info"""
+    for enabled in (False, True)
+}
+ADMIN_SEARCH_TEXT = """🔍 **Search Videos**
+        
+Use the following commands to search:
+\\• /find \\<query\\> \\- Search videos by name/description
+\\• /database \\- List all videos with IDs
 
-    if data == "admin_panel_main":
-        # Recreate the main admin panel
-        keyboard = types.InlineKeyboardMarkup(row_width=2)
+Example: `/find funny` to search for videos with "funny" in the name"""
+ADMIN_BROADCAST_TEXT = """📢 **Broadcast Messages**
+        
+To send a message to all users:
+\\• `/broadcast Your message here`
 
-        # Statistics and Info
-        keyboard.add(
-            types.InlineKeyboardButton("📊 Stats", callback_data="admin_stats"),
-            types.InlineKeyboardButton("👥 Users", callback_data="admin_users"))
+Example: `/broadcast New videos available\\!`
 
-        # Video Management
-        keyboard.add(
-            types.InlineKeyboardButton("🎥 Videos",
-                                       callback_data="admin_videos"),
-            types.InlineKeyboardButton("🔍 Search",
-                                       callback_data="admin_search"))
+The message will be sent to all registered users\\."""
+ADMIN_BULK_TEXT = """🔧 **Bulk Operations**
 
-        # User Management
-        keyboard.add(
-            types.InlineKeyboardButton("🚫 Banned",
-                                       callback_data="admin_banned"),
-            types.InlineKeyboardButton("📝 Activity",
-                                       callback_data="admin_activity"))
+⚠️ **Warning:** These operations affect multiple items\\. Use with caution\\.
 
-        # System Controls
-        keyboard.add(
-            types.InlineKeyboardButton("🔧 Settings",
-                                       callback_data="admin_settings"),
-            types.InlineKeyboardButton("📢 Broadcast",
-                                       callback_data="admin_broadcast"))
+Select an operation:"""
+CHANNEL_BROADCAST_PROMPT = "📢 **Channel Broadcast**\n\nSelect which channel to broadcast to:"
 
-        # Channel Broadcasting and Advanced Features
-        keyboard.add(
-            types.InlineKeyboardButton(
-                "📺 Channel Broadcast",
-                callback_data="admin_channel_broadcast"),
-            types.InlineKeyboardButton("📊 Analytics",
-                                       callback_data="admin_analytics"))
 
-        keyboard.add(
-            types.InlineKeyboardButton("📝 Templates",
-                                       callback_data="admin_templates"),
-            types.InlineKeyboardButton("⏰ Schedule",
-                                       callback_data="admin_schedule"))
+def render_admin_panel_main(call, user_id, chat_id):
+    """Show the admin panel home screen"""
+    keyboard = (ADMIN_PANEL_KEYBOARD_OWNER if user_id == OWNER
+                else ADMIN_PANEL_KEYBOARD)
 
-        keyboard.add(
-            types.InlineKeyboardButton("🔧 Bulk Operations",
-                                       callback_data="admin_bulk"))
+    bot.edit_message_text(ADMIN_PANEL_TEXT,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=keyboard,
+                          parse_mode='MarkdownV2')
 
-        panel_text = """🎛️ **Admin Control Panel**
-        
-Welcome to the admin dashboard\\! Use the buttons below to manage the bot\\."""
 
-        bot.edit_message_text(panel_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+def render_admin_stats(call, user_id, chat_id):
+    """Show quick user and video counts in a popup, leaving the panel in place"""
+    counts = db.get_dashboard_counts()
+    join_status = "enabled" if join_access_enabled else "disabled"
 
-    elif data == "admin_stats":
-        # Show stats
-        user_count = db.get_user_count()
-        video_count = db.get_video_count()
-        join_status = "enabled" if join_access_enabled else "disabled"
+    stats_text = f"""📊 Quick Stats
 
-        stats_text = f"""📊 **Quick Stats**
-        
-👥 Users: {user_count}
-🎥 Videos: {video_count}  
+👥 Users: {counts['users']}
+🎥 Videos: {counts['videos']}
 🔧 Join Requirement: {join_status}"""
 
-        bot.edit_message_text(stats_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
+    bot.answer_callback_query(call.id, stats_text, show_alert=True)
+
 
-    elif data == "admin_users":
-        user_count = db.get_user_count()
-        users_text = f"""👥 **User Management**
+def render_admin_users(call, user_id, chat_id):
+    """Show user management options"""
+    counts = db.get_dashboard_counts()
+    users_text = f"""👥 **User Management**
         
-Total Users: {user_count}
+Total Users: {counts['users']}
 
 Use /cleanup\\_users to remove inactive users
 Use /broadcast to send messages to all users"""
 
-        bot.edit_message_text(users_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
+    bot.edit_message_text(users_text,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-    elif data == "admin_videos":
-        video_count = db.get_video_count()
-        recent = db.get_recent_videos(3)
 
-        videos_text = f"""🎥 **Video Management**
+def render_admin_videos(call, user_id, chat_id):
+    """Show video management with the latest uploads"""
+    counts, recent = run_concurrently(db.get_dashboard_counts,
+                                      lambda: db.get_recent_videos(3))
+
+    videos_text = f"""🎥 **Video Management**
         
-Total Videos: {video_count}
+Total Videos: {counts['videos']}
 
 Recent uploads:"""
 
-        for video in recent:
-            name = escape_markdown_v2(video['name'][:30] +
-                                      "..." if len(video['name']) >
-                                      30 else video['name'])
-            videos_text += f"\n\\• {name}"
+    for video in recent:
+        name = truncate_markdown_v2(video['name'])
+        videos_text += f"\n\\• {name}"
 
-        if not recent:
-            videos_text += "\n\\• No videos yet"
+    if not recent:
+        videos_text += "\n\\• No videos yet"
 
-        videos_text += "\n\nUse /video\\_manage for detailed management"
+    videos_text += "\n\nUse /video\\_manage for detailed management"
 
-        bot.edit_message_text(videos_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
-
-    elif data == "admin_settings":
-        join_status = "✅ Enabled" if join_access_enabled else "❌ Disabled"
-        channels = [c for c in [CHANNEL_1, CHANNEL_2] if c]
-
-        settings_text = f"""🔧 **Bot Settings**
-        
-Channel Join Requirement: {join_status}
-Configured Channels: {len(channels)}
-
-Commands:
-\\• /join\\_access \\- Toggle channel requirement
-\\• /system\\_info \\- Detailed system info"""
-
-        bot.edit_message_text(settings_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
+    bot.edit_message_text(videos_text,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-    elif data == "admin_search":
-        search_text = f"""🔍 **Search Videos**
-        
-Use the following commands to search:
-\\• /find \\<query\\> \\- Search videos by name/description
-\\• /database \\- List all videos with IDs
 
-Example: `/find funny` to search for videos with "funny" in the name"""
+def render_admin_settings(call, user_id, chat_id):
+    """Show bot settings"""
+    bot.edit_message_text(ADMIN_SETTINGS_TEXTS[join_access_enabled],
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-        bot.edit_message_text(search_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
 
-    elif data == "admin_broadcast":
-        broadcast_text = f"""📢 **Broadcast Messages**
-        
-To send a message to all users:
-\\• `/broadcast Your message here`
+def render_admin_search(call, user_id, chat_id):
+    """Show video search help"""
+    bot.edit_message_text(ADMIN_SEARCH_TEXT,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-Example: `/broadcast New videos available\\!`
 
-The message will be sent to all registered users\\."""
+def render_admin_broadcast(call, user_id, chat_id):
+    """Show broadcast help"""
+    bot.edit_message_text(ADMIN_BROADCAST_TEXT,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-        bot.edit_message_text(broadcast_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
 
-    elif data == "admin_banned":
-        banned_users = db.get_banned_users()
-        banned_text = f"""🚫 **Banned Users Management**
+def render_admin_banned(call, user_id, chat_id):
+    """Show banned users management"""
+    banned_users = db.get_banned_users()
+    lines = [f"""🚫 **Banned Users Management**
         
 Total Banned Users: {len(banned_users)}
 
@@ -1492,27 +1873,29 @@ Commands:
 \\• `/unban\\_user <id>` \\- Unban a user
 \\• `/user\\_info <id>` \\- Get user details
 
-Recent bans:"""
+Recent bans:"""]
 
-        recent_banned = banned_users[:3] if banned_users else []
-        for user in recent_banned:
-            user_display = f"@{escape_markdown_v2(user['username'])}" if user[
-                'username'] else f"{user['first_name'] or 'Unknown'}"
-            banned_text += f"\n\\• {user_display} \\- {user['banned_at'][:10] if user['banned_at'] else 'Unknown'}"
+    recent_banned = banned_users[:3] if banned_users else []
+    for user in recent_banned:
+        user_display = f"@{escape_markdown_v2(user['username'])}" if user[
+            'username'] else f"{user['first_name'] or 'Unknown'}"
+        lines.append(f"\\• {user_display} \\- {user['banned_at'][:10] if user['banned_at'] else 'Unknown'}")
 
-        if not recent_banned:
-            banned_text += "\n\\• No banned users"
+    if not recent_banned:
+        lines.append("\\• No banned users")
 
-        bot.edit_message_text(banned_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
+    bot.edit_message_text("\n".join(lines),
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-    elif data == "admin_activity":
-        activities = db.get_recent_activity(5)
-        user_stats = db.get_user_stats_detailed()
 
-        activity_text = f"""📝 **User Activity Monitor**
+def render_admin_activity(call, user_id, chat_id):
+    """Show the user activity monitor"""
+    activities, user_stats = run_concurrently(
+        lambda: db.get_recent_activity(5), db.get_user_stats_detailed)
+
+    lines = [f"""📝 **User Activity Monitor**
         
 Active Users \\(7d\\): {user_stats['active_users_7d']}
 New Users \\(7d\\): {user_stats['new_users_7d']}
@@ -1522,27 +1905,29 @@ Commands:
 \\• `/search\\_users <query>` \\- Find users
 \\• `/user\\_info <id>` \\- User details
 
-Recent Activity:"""
+Recent Activity:"""]
 
-        for activity in activities:
-            user_display = f"@{escape_markdown_v2(activity['username'])}" if activity[
-                'username'] else f"{activity['first_name'] or 'Unknown'}"
-            action = escape_markdown_v2(activity['action'])
-            time_str = activity['timestamp'][5:16] if activity[
-                'timestamp'] else 'Unknown'
-            activity_text += f"\n\\• {user_display} \\- {action} \\({time_str}\\)"
+    for activity in activities:
+        user_display = f"@{escape_markdown_v2(activity['username'])}" if activity[
+            'username'] else f"{activity['first_name'] or 'Unknown'}"
+        action = escape_markdown_v2(activity['action'])
+        time_str = activity['timestamp'][5:16] if activity[
+            'timestamp'] else 'Unknown'
+        lines.append(f"\\• {user_display} \\- {action} \\({time_str}\\)")
 
-        if not activities:
-            activity_text += "\n\\• No recent activity"
+    if not activities:
+        lines.append("\\• No recent activity")
+
+    bot.edit_message_text("\n".join(lines),
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-        bot.edit_message_text(activity_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
 
-    elif data == "admin_cleanup":
-        user_count = db.get_user_count()
-        cleanup_text = f"""🧹 **Database Cleanup**
+def render_admin_cleanup(call, user_id, chat_id):
+    """Show user cleanup help"""
+    user_count = db.get_user_count()
+    cleanup_text = f"""🧹 **Database Cleanup**
         
 Current users: {user_count}
 
@@ -1551,132 +1936,79 @@ Available cleanup options:
 
 This will remove users who have blocked the bot\\."""
 
-        bot.edit_message_text(cleanup_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
-
-    elif data == "admin_videos_more":
-        # Handle video pagination
-        videos = db.get_all_videos()
-        keyboard = types.InlineKeyboardMarkup(row_width=1)
-
-        # Show videos 11-20
-        for video in videos[10:20]:
-            video_name = video['name'][:25] + "..." if len(
-                video['name']) > 25 else video['name']
-            keyboard.add(
-                types.InlineKeyboardButton(
-                    f"🎥 {video_name}",
-                    callback_data=f"manage_video_{video['id']}"))
-
-        if len(videos) > 20:
-            keyboard.add(
-                types.InlineKeyboardButton("➡️ Show Even More",
-                                           callback_data="admin_videos_more2"))
-
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to First 10",
-                                       callback_data="admin_videos"))
-
-        videos_text = f"""🎥 **Video Management** \\(Videos 11\\-20 of {len(videos)}\\)
+    bot.edit_message_text(cleanup_text,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-Select a video to manage:"""
 
-        bot.edit_message_text(videos_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
-
-    elif data == "admin_videos_more2":
-        # Handle further pagination
-        videos = db.get_all_videos()
-        keyboard = types.InlineKeyboardMarkup(row_width=1)
+def render_admin_videos_more(call, user_id, chat_id):
+    """Show videos 11-20 for management"""
+    videos_text, keyboard = render_video_page(1)
+    bot.edit_message_text(videos_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=keyboard,
+                          parse_mode='MarkdownV2')
 
-        # Show remaining videos from 21+
-        for video in videos[20:30]:
-            video_name = video['name'][:25] + "..." if len(
-                video['name']) > 25 else video['name']
-            keyboard.add(
-                types.InlineKeyboardButton(
-                    f"🎥 {video_name}",
-                    callback_data=f"manage_video_{video['id']}"))
 
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Videos 11-20",
-                                       callback_data="admin_videos_more"))
-        keyboard.add(
-            types.InlineKeyboardButton("🏠 Back to Panel",
-                                       callback_data="admin_videos"))
+def render_admin_videos_more2(call, user_id, chat_id):
+    """Show videos 21-30 for management"""
+    videos_text, keyboard = render_video_page(2)
+    bot.edit_message_text(videos_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=keyboard,
+                          parse_mode='MarkdownV2')
 
-        videos_text = f"""🎥 **Video Management** \\(Videos 21\\+ of {len(videos)}\\)
 
-Select a video to manage:"""
 
-        bot.edit_message_text(videos_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+def render_admin_database(call, user_id, chat_id):
+    """Show database status (owner only)"""
+    if user_id != OWNER:
+        return
 
-    elif data == "admin_database" and user_id == OWNER:
-        user_count = db.get_user_count()
-        video_count = db.get_video_count()
+    counts = db.get_dashboard_counts()
 
-        db_text = f"""🗄️ **Database Status**
+    db_text = f"""🗄️ **Database Status**
         
-Users Table: {user_count} records
-Videos Table: {video_count} records
+Users Table: {counts['users']} records
+Videos Table: {counts['videos']} records
 
 ⚠️ **Maintenance Commands:**
 \\• /cleanup\\_users \\- Remove inactive users
 
 *Use with caution\\!*"""
 
-        bot.edit_message_text(db_text,
-                              chat_id,
-                              call.message.message_id,
-                              parse_mode='MarkdownV2')
-
-    elif data == "admin_channel_broadcast":
-        if not CHANNEL_1 and not CHANNEL_2:
-            bot.edit_message_text(
-                "❌ No channels configured\\. Please set CHANNEL\\_1 and/or CHANNEL\\_2 environment variables\\.",
-                chat_id,
-                call.message.message_id,
-                parse_mode='MarkdownV2')
-            return
-
-        keyboard = types.InlineKeyboardMarkup()
+    bot.edit_message_text(db_text,
+                          chat_id,
+                          call.message.message_id,
+                          parse_mode='MarkdownV2')
 
-        if CHANNEL_1:
-            keyboard.add(
-                types.InlineKeyboardButton(
-                    f"📢 Channel 1 ({CHANNEL_1})",
-                    callback_data="broadcast_channel_1"))
-        if CHANNEL_2:
-            keyboard.add(
-                types.InlineKeyboardButton(
-                    f"📢 Channel 2 ({CHANNEL_2})",
-                    callback_data="broadcast_channel_2"))
-
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Panel",
-                                       callback_data="admin_panel_main"))
 
+def render_admin_channel_broadcast(call, user_id, chat_id):
+    """Show the channel picker for channel broadcasts"""
+    if not REQUIRED_CHANNELS:
         bot.edit_message_text(
-            "📢 **Channel Broadcast**\n\nSelect which channel to broadcast to:",
+            "❌ No channels configured\\. Please set CHANNEL\\_1 and/or CHANNEL\\_2 environment variables\\.",
             chat_id,
             call.message.message_id,
-            reply_markup=keyboard,
             parse_mode='MarkdownV2')
+        return
 
-    elif data == "admin_analytics":
-        summary = db.get_analytics_summary()
-        popular_videos = db.get_popular_videos(3)
+    bot.edit_message_text(
+        CHANNEL_BROADCAST_PROMPT,
+        chat_id,
+        call.message.message_id,
+        reply_markup=ADMIN_CHANNEL_BROADCAST_KEYBOARD,
+        parse_mode='MarkdownV2')
 
-        analytics_text = f"""📊 **Video Analytics Summary**
+
+def render_admin_analytics(call, user_id, chat_id):
+    """Show the video analytics summary"""
+    summary, popular_videos = db.get_analytics_bundle(3)
+
+    analytics_text = f"""📊 **Video Analytics Summary**
 
 📈 **Overview:**
 \\• Total Views: {summary['total_views']}
@@ -1685,149 +2017,160 @@ Videos Table: {video_count} records
 
 🔥 **Top 3 Videos:**"""
 
-        for i, video in enumerate(popular_videos, 1):
-            video_name = escape_markdown_v2(video['name'][:25] +
-                                            "..." if len(video['name']) >
-                                            25 else video['name'])
-            analytics_text += f"\n{i}\\. {video_name} \\- {video['view_count']} views"
+    for i, video in enumerate(popular_videos, 1):
+        video_name = truncate_markdown_v2(video['name'], 25)
+        analytics_text += f"\n{i}\\. {video_name} \\- {video['view_count']} views"
 
-        if not popular_videos:
-            analytics_text += "\nNo views recorded yet\\."
+    if not popular_videos:
+        analytics_text += "\nNo views recorded yet\\."
 
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("📊 Detailed Analytics",
-                                       callback_data="analytics_detailed"))
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Panel",
-                                       callback_data="admin_panel_main"))
+    bot.edit_message_text(analytics_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=ADMIN_ANALYTICS_KEYBOARD,
+                          parse_mode='MarkdownV2')
 
-        bot.edit_message_text(analytics_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
 
-    elif data == "admin_templates":
-        templates = db.get_templates()
+def render_admin_templates(call, user_id, chat_id):
+    """Show message templates"""
+    templates = db.get_templates()
 
-        keyboard = types.InlineKeyboardMarkup(row_width=1)
+    keyboard = types.InlineKeyboardMarkup(row_width=1)
 
-        if templates:
-            for template in templates[:5]:  # Show first 5 templates
-                template_name = template['name'][:20] + "..." if len(
-                    template['name']) > 20 else template['name']
-                keyboard.add(
-                    types.InlineKeyboardButton(
-                        f"📝 {template_name}",
-                        callback_data=f"template_view_{template['id']}"))
+    if templates:
+        for template in templates[:5]:  # Show first 5 templates
+            template_name = truncate(template['name'], 20)
+            keyboard.add(
+                types.InlineKeyboardButton(
+                    f"📝 {template_name}",
+                    callback_data=f"template_view_{template['id']}"))
 
-        keyboard.add(
-            types.InlineKeyboardButton("➕ Create Template",
-                                       callback_data="template_create"))
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Panel",
-                                       callback_data="admin_panel_main"))
+    keyboard.add(
+        types.InlineKeyboardButton("➕ Create Template",
+                                   callback_data="template_create"))
+    keyboard.add(
+        types.InlineKeyboardButton("⬅️ Back to Panel",
+                                   callback_data="admin_panel_main"))
 
-        templates_text = f"📝 **Message Templates** \\({len(templates)} total\\)\n\nManage your broadcast templates:"
-        bot.edit_message_text(templates_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+    templates_text = f"📝 **Message Templates** \\({len(templates)} total\\)\n\nManage your broadcast templates:"
+    bot.edit_message_text(templates_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=keyboard,
+                          parse_mode='MarkdownV2')
 
-    elif data == "admin_schedule":
-        scheduled_broadcasts = db.get_scheduled_broadcasts(user_id)
-        pending_count = len(
-            [b for b in scheduled_broadcasts if b['status'] == 'pending'])
 
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("➕ Schedule New",
-                                       callback_data="schedule_new"))
+def render_admin_schedule(call, user_id, chat_id):
+    """Show the admin's scheduled broadcasts"""
+    counts = db.get_scheduled_counts(user_id)
 
-        if scheduled_broadcasts:
-            keyboard.add(
-                types.InlineKeyboardButton("📋 View All",
-                                           callback_data="schedule_view"))
+    schedule_text = f"""⏰ **Scheduled Broadcasts**
 
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Panel",
-                                       callback_data="admin_panel_main"))
+📊 **Your Schedules:**
+\\• Total: {counts['total']}
+\\• Pending: {counts['pending']}
+\\• Completed: {counts['total'] - counts['pending']}"""
 
-        schedule_text = f"""⏰ **Scheduled Broadcasts**
+    bot.edit_message_text(schedule_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=ADMIN_SCHEDULE_KEYBOARDS[bool(counts['total'])],
+                          parse_mode='MarkdownV2')
 
-📊 **Your Schedules:**
-\\• Total: {len(scheduled_broadcasts)}
-\\• Pending: {pending_count}
-\\• Completed: {len(scheduled_broadcasts) - pending_count}"""
 
-        bot.edit_message_text(schedule_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+def render_admin_bulk(call, user_id, chat_id):
+    """Show bulk operations"""
+    bot.edit_message_text(ADMIN_BULK_TEXT,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=ADMIN_BULK_KEYBOARD,
+                          parse_mode='MarkdownV2')
 
-    elif data == "admin_bulk":
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("🗑️ Bulk Delete Videos",
-                                       callback_data="bulk_delete_videos"),
-            types.InlineKeyboardButton("🚫 Bulk Ban Users",
-                                       callback_data="bulk_ban_users"))
-        keyboard.add(
-            types.InlineKeyboardButton("📊 Export Data",
-                                       callback_data="bulk_export"),
-            types.InlineKeyboardButton("🧹 Clean Database",
-                                       callback_data="bulk_clean"))
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Panel",
-                                       callback_data="admin_panel_main"))
 
-        bulk_text = """🔧 **Bulk Operations**
+# Panels short enough for a callback alert (200 chars); their renderer answers
+# the callback with the content itself, saving the edit_message_text call
+ADMIN_ALERT_CALLBACKS = frozenset({'admin_stats'})
+
+# Admin panel buttons by callback_data, looked up once per click
+ADMIN_CALLBACKS = {
+    'admin_panel_main': render_admin_panel_main,
+    'admin_stats': render_admin_stats,
+    'admin_users': render_admin_users,
+    'admin_videos': render_admin_videos,
+    'admin_settings': render_admin_settings,
+    'admin_search': render_admin_search,
+    'admin_broadcast': render_admin_broadcast,
+    'admin_banned': render_admin_banned,
+    'admin_activity': render_admin_activity,
+    'admin_cleanup': render_admin_cleanup,
+    'admin_videos_more': render_admin_videos_more,
+    'admin_videos_more2': render_admin_videos_more2,
+    'admin_database': render_admin_database,
+    'admin_channel_broadcast': render_admin_channel_broadcast,
+    'admin_analytics': render_admin_analytics,
+    'admin_templates': render_admin_templates,
+    'admin_schedule': render_admin_schedule,
+    'admin_bulk': render_admin_bulk,
+}
 
-⚠️ **Warning:** These operations affect multiple items\\. Use with caution\\.
 
-Select an operation:"""
+# Enhanced callback handler for admin features
+@bot.callback_query_handler(func=lambda call: call.data.startswith("admin_"))
+def admin_callback_handler(call):
+    """Handle admin panel callbacks"""
+    if not first_delivery(call):
+        return
+    user_id = call.from_user.id
+    chat_id = call.message.chat.id
+    data = call.data
 
-        bot.edit_message_text(bulk_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+    # Check admin permissions
+    if user_id not in ADMIN_IDS:
+        bot.answer_callback_query(call.id,
+                                  "❌ Admin access required",
+                                  show_alert=True)
+        return
+
+    # Acknowledge before anything else; alert callbacks answer with their popup instead
+    if data not in ADMIN_ALERT_CALLBACKS:
+        bot.answer_callback_query(call.id)
+
+    # Log admin activity
+    try:
+        db.log_user_activity(user_id, "admin_callback",
+                             f"Used admin panel: {data}")
+    except Exception as e:
+        logger.error(f"Failed to log admin activity: {e}")
+
+    renderer = ADMIN_CALLBACKS.get(data)
+    if renderer:
+        run_in_background(renderer, call, user_id, chat_id)
 
 
 @bot.callback_query_handler(
     func=lambda call: call.data.startswith("manage_video_"))
 def video_manage_callback(call):
     """Handle video management callbacks"""
-    if call.from_user.id not in ADMINS and call.from_user.id != OWNER:
+    if not first_delivery(call):
+        return
+    if call.from_user.id not in ADMIN_IDS:
         bot.answer_callback_query(call.id,
                                   "❌ Admin access required",
                                   show_alert=True)
         return
 
+    bot.answer_callback_query(call.id)
+
     video_id = call.data.replace("manage_video_", "")
     video = db.get_video_by_id(video_id)
 
     if not video:
-        bot.answer_callback_query(call.id,
-                                  "❌ Video not found",
-                                  show_alert=True)
+        bot.edit_message_text("❌ Video not found\\.",
+                              call.message.chat.id,
+                              call.message.message_id,
+                              parse_mode='MarkdownV2')
         return
 
-    bot.answer_callback_query(call.id)
-
-    # Create management buttons for this video
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(
-        types.InlineKeyboardButton("🎬 Preview",
-                                   callback_data=f"preview_video_{video_id}"),
-        types.InlineKeyboardButton("🗑️ Delete",
-                                   callback_data=f"delete_video_{video_id}"))
-    keyboard.add(
-        types.InlineKeyboardButton("⬅️ Back", callback_data="admin_videos"))
-
     video_info = f"""🎥 **Video Details**
     
 **Name:** {escape_markdown_v2(video['name'])}
@@ -1839,7 +2182,7 @@ Choose an action:"""
     bot.edit_message_text(video_info,
                           call.message.chat.id,
                           call.message.message_id,
-                          reply_markup=keyboard,
+                          reply_markup=video_actions_keyboard(video_id),
                           parse_mode='MarkdownV2')
 
 
@@ -1847,7 +2190,9 @@ Choose an action:"""
     ("preview_video_", "delete_video_")))
 def video_action_callback(call):
     """Handle video preview/delete actions"""
-    if call.from_user.id not in ADMINS and call.from_user.id != OWNER:
+    if not first_delivery(call):
+        return
+    if call.from_user.id not in ADMIN_IDS:
         bot.answer_callback_query(call.id,
                                   "❌ Admin access required",
                                   show_alert=True)
@@ -1887,11 +2232,13 @@ def video_action_callback(call):
     ("broadcast_channel_", "broadcast_cancel")))
 def handle_channel_broadcast_callback(call):
     """Handle channel broadcast callbacks with enhanced security"""
+    if not first_delivery(call):
+        return
     user_id = call.from_user.id
     chat_id = call.message.chat.id
 
     # Re-validate admin/owner permissions on every callback
-    if user_id not in ADMINS and user_id != OWNER:
+    if user_id not in ADMIN_IDS:
         bot.answer_callback_query(call.id,
                                   "❌ Admin access required",
                                   show_alert=True)
@@ -1901,8 +2248,7 @@ def handle_channel_broadcast_callback(call):
 
     if call.data == "broadcast_cancel":
         # Clean up state and confirm cancellation
-        if user_id in user_states:
-            del user_states[user_id]
+        user_states.pop(user_id)
         bot.edit_message_text("❌ Channel broadcast cancelled\\.",
                               chat_id,
                               call.message.message_id,
@@ -1912,42 +2258,31 @@ def handle_channel_broadcast_callback(call):
         return
 
     # Handle channel selection with validation
-    target_channel = None
-    channel_name = None
-
-    if call.data == "broadcast_channel_1" and CHANNEL_1:
-        target_channel = CHANNEL_1
-        channel_name = "Channel 1"
-    elif call.data == "broadcast_channel_2" and CHANNEL_2:
-        target_channel = CHANNEL_2
-        channel_name = "Channel 2"
-    else:
+    target = BROADCAST_TARGETS.get(call.data)
+    if target is None:
         bot.edit_message_text("❌ Invalid channel selection\\.",
                               chat_id,
                               call.message.message_id,
                               parse_mode='MarkdownV2')
         return
+    channel_name, target_channel, target_channel_id = target
 
     # Store the selected channel with initiator verification
-    user_states[user_id] = {
+    user_states.set(user_id, {
         'state': BROADCAST_STATES['AWAITING_CONTENT'],
         'broadcast_type': 'channel',
         'target_channel': target_channel,
+        'target_channel_id': target_channel_id,
         'channel_name': channel_name,
         'initiator_id': user_id,  # Track who started this flow
         'chat_id': chat_id  # Track original chat
-    }
+    })
 
     # Log activity
     db.log_user_activity(
         user_id, "broadcast_started",
         f"Started broadcast to {channel_name} ({target_channel})")
 
-    keyboard = types.InlineKeyboardMarkup()
-    keyboard.add(
-        types.InlineKeyboardButton("❌ Cancel Broadcast",
-                                   callback_data="broadcast_cancel"))
-
     bot.edit_message_text(
         f"📢 **Broadcasting to {channel_name}** \\(`{escape_markdown_v2(target_channel)}`\\)\n\n"
         "Now send me:\n"
@@ -1956,7 +2291,7 @@ def handle_channel_broadcast_callback(call):
         "*The content will be sent exactly as you provide it\\.*",
         chat_id,
         call.message.message_id,
-        reply_markup=keyboard,
+        reply_markup=CANCEL_BROADCAST_KEYBOARD,
         parse_mode='MarkdownV2')
 
 
@@ -1973,17 +2308,14 @@ def handle_photo(message):
         return
 
     # Check if this is for channel broadcasting
-    if user_id in user_states and user_states[user_id].get(
-            'broadcast_type') == 'channel':
-        state = user_states[user_id]
-
+    state = user_states.get(user_id)
+    if state and state.get('broadcast_type') == 'channel':
         # Verify user identity and state validity
         if (state.get('state') != BROADCAST_STATES['AWAITING_CONTENT']
                 or state.get('initiator_id') != user_id
-                or user_id not in ADMINS and user_id != OWNER):
+                or user_id not in ADMIN_IDS):
             # Clean up invalid state
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
             bot.reply_to(
                 message,
                 "❌ Invalid broadcast state\\. Please start over with /channel\\_broadcast\\.",
@@ -2006,13 +2338,7 @@ def handle_photo(message):
             return
 
         try:
-            # Normalize channel identifier
-            if target_channel.startswith('@'):
-                channel_id = target_channel
-            elif target_channel.startswith('-'):
-                channel_id = int(target_channel)  # Numeric chat ID
-            else:
-                channel_id = f'@{target_channel}'
+            channel_id = state['target_channel_id']
 
             # Send photo to channel
             bot.send_photo(
@@ -2034,7 +2360,7 @@ def handle_photo(message):
                 parse_mode=None)
 
             # Clear user state
-            del user_states[user_id]
+            user_states.pop(user_id)
 
         except ApiTelegramException as e:
             error_msg = str(e)
@@ -2052,25 +2378,23 @@ def handle_photo(message):
                 f"Failed to send to {target_channel}: {error_msg}")
 
             # Clean up state on error
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
 
         except Exception as e:
             bot.reply_to(message,
                          f"❌ Unexpected error: `{escape_markdown_v2(str(e))}`",
                          parse_mode='MarkdownV2')
-            print(f"Failed to send photo to {target_channel}: {e}")
+            logger.error(f"Failed to send photo to {target_channel}: {e}")
             db.log_user_activity(user_id, "photo_broadcast_error",
                                  f"Unexpected error: {str(e)}")
 
             # Clean up state on error
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
 
         return
 
     # If not admin or not broadcasting, ignore
-    if user_id not in ADMINS and user_id != OWNER:
+    if user_id not in ADMIN_IDS:
         return
 
 
@@ -2081,21 +2405,21 @@ def handle_video(message):
     username = message.from_user.username
     first_name = message.from_user.first_name
 
-    # Check if user is banned first (ban overrides admin status)
+    # Check if user is banned first (staff always pass)
     if not check_user_access(user_id, username, first_name, "video_upload"):
         send_banned_message(message)
         return
 
-    if message.from_user.id not in ADMINS and message.from_user.id != OWNER:
+    if message.from_user.id not in ADMIN_IDS:
         bot.reply_to(message,
                      "🚫 Only admins can upload videos\\.",
                      parse_mode='MarkdownV2')
         return
 
-    user_states[user_id] = {
+    user_states.set(user_id, {
         'state': 'awaiting_name',
         'file_id': message.video.file_id
-    }
+    })
     bot.reply_to(message,
                  "📛 Please send the name for this video\\:",
                  parse_mode='MarkdownV2')
@@ -2113,10 +2437,10 @@ def handle_text(message):
         send_banned_message(message)
         return
 
-    if user_id not in user_states:
+    state_info = user_states.get(user_id)
+    if state_info is None:
         return
 
-    state_info = user_states[user_id]
     state = state_info.get('state')
 
     # Handle channel broadcasting text content with enhanced security
@@ -2125,10 +2449,9 @@ def handle_text(message):
     ) == 'channel' and state == BROADCAST_STATES['AWAITING_CONTENT']:
         # Verify user identity and state validity
         if (state_info.get('initiator_id') != user_id
-                or user_id not in ADMINS and user_id != OWNER):
+                or user_id not in ADMIN_IDS):
             # Clean up invalid state
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
             bot.reply_to(
                 message,
                 "❌ Invalid broadcast state\\. Please start over with /channel\\_broadcast\\.",
@@ -2148,13 +2471,7 @@ def handle_text(message):
             return
 
         try:
-            # Normalize channel identifier
-            if target_channel.startswith('@'):
-                channel_id = target_channel
-            elif target_channel.startswith('-'):
-                channel_id = int(target_channel)  # Numeric chat ID
-            else:
-                channel_id = f'@{target_channel}'
+            channel_id = state_info['target_channel_id']
 
             # Send text message to channel
             bot.send_message(
@@ -2176,7 +2493,7 @@ def handle_text(message):
                 parse_mode=None)
 
             # Clear user state
-            del user_states[user_id]
+            user_states.pop(user_id)
 
         except ApiTelegramException as e:
             error_msg = str(e)
@@ -2194,27 +2511,26 @@ def handle_text(message):
                 f"Failed to send to {target_channel}: {error_msg}")
 
             # Clean up state on error
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
 
         except Exception as e:
             bot.reply_to(message,
                          f"❌ Unexpected error: `{escape_markdown_v2(str(e))}`",
                          parse_mode='MarkdownV2')
-            print(f"Failed to send text to {target_channel}: {e}")
+            logger.error(f"Failed to send text to {target_channel}: {e}")
             db.log_user_activity(user_id, "text_broadcast_error",
                                  f"Unexpected error: {str(e)}")
 
             # Clean up state on error
-            if user_id in user_states:
-                del user_states[user_id]
+            user_states.pop(user_id)
 
         return
 
     # Handle video upload states
     if state == 'awaiting_name':
-        user_states[user_id]['name'] = message.text
-        user_states[user_id]['state'] = 'awaiting_description'
+        state_info['name'] = message.text
+        state_info['state'] = 'awaiting_description'
+        user_states.set(user_id, state_info)
         bot.reply_to(
             message,
             "📝 Please send the description for this video \\(or type 'skip' to skip\\)\\:",
@@ -2222,19 +2538,18 @@ def handle_text(message):
 
     elif state == 'awaiting_description':
         description = message.text if message.text.lower() != 'skip' else ''
-        file_id = user_states[user_id]['file_id']
-        name = user_states[user_id]['name']
+        file_id = state_info['file_id']
+        name = state_info['name']
 
         video_id = db.add_video(file_id, name, description)
 
-        bot_info = bot.get_me()
-        bot_username = bot_info.username or ""
+        bot_username = get_bot_username() or ""
         if not bot_username:
             bot.reply_to(
                 message,
                 "⚠️ Unable to determine bot username; cannot create shareable URL\\.",
                 parse_mode='MarkdownV2')
-            del user_states[user_id]
+            user_states.pop(user_id)
             return
         shareable_url = f"https://t.me/{bot_username}?start={video_id}"
         escaped_shareable_url = escape_markdown_v2(shareable_url)
@@ -2243,302 +2558,390 @@ def handle_text(message):
             message,
             f"✅ Video uploaded successfully\\! ID: `{escape_markdown_v2(str(video_id))}`\n\n**Shareable URL:** {escaped_shareable_url}",
             parse_mode='MarkdownV2')
-        del user_states[user_id]
+        user_states.pop(user_id)
 
 
-@bot.callback_query_handler(func=lambda call: True)
-def handle_callback(call):
-    """Handle button clicks"""
-    user_id = call.from_user.id
-    chat_id = call.message.chat.id
-    data = call.data
-    username = call.from_user.username
-    first_name = call.from_user.first_name
-
-    # Check if user is banned
-    if not check_user_access(user_id, username, first_name,
-                             f"callback:{data}"):
-        bot.answer_callback_query(call.id,
-                                  "❌ You are banned from using this bot",
-                                  show_alert=True)
+def handle_video_callback(call, user_id, chat_id):
+    """Send the video a browse/search button points at"""
+    video_id = call.data.split("_")[1]
+    if join_access_enabled and not check_channel_membership(user_id):
+        # retry_ payloads drop the cached "not a member" result once the user says they joined
+        prompt_join_channels(chat_id, user_id, f"retry_start_{video_id}")
         return
 
-    bot.answer_callback_query(call.id)  # Acknowledge the button press
-
-    if data.startswith("video_"):
-        video_id = data.split("_")[1]
-        if join_access_enabled and not check_channel_membership(user_id):
-            prompt_join_channels(chat_id, user_id, f"video_{video_id}")
-            return
+    video = db.get_video_by_id(video_id)
+    if video:
+        # Log video view for analytics
+        db.log_video_view(video_id, user_id)
 
-        video = db.get_video_by_id(video_id)
-        if video:
-            # Log video view for analytics
-            db.log_video_view(video_id, user_id)
+        caption_text = video_caption(video['name'], video['description'])
+        send_auto_delete_video(chat_id, video['file_id'], caption_text)
+    else:
+        bot.send_message(
+            chat_id,
+            "❌ Video not found\\. Please check the ID and try again\\.",
+            parse_mode='MarkdownV2')
 
-            caption_text = f"🎥 *{escape_markdown_v2(video['name'])}*\n\n{escape_markdown_v2(video['description'])}"
-            sent_message = bot.send_video(chat_id,
-                                          video['file_id'],
-                                          caption=caption_text,
-                                          supports_streaming=True,
-                                          parse_mode='MarkdownV2')
-            threading.Thread(target=delete_video_message,
-                             args=(chat_id, sent_message.message_id)).start()
-        else:
-            bot.send_message(
-                chat_id,
-                "❌ Video not found\\. Please check the ID and try again\\.",
-                parse_mode='MarkdownV2')
 
-    elif data == "bulk_delete_videos":
-        # Check admin access
-        if user_id not in ADMINS and user_id != OWNER:
-            bot.answer_callback_query(call.id,
-                                      "❌ Admin access required",
-                                      show_alert=True)
-            return
+def handle_results_page_callback(call, user_id, chat_id):
+    """Switch a browse (browse_p<page>) or search (find_p<page>_<query>) message to another page"""
+    kind, _, payload = call.data.partition("_p")
+    page, _, query = payload.partition("_")
+    if not page.isdigit():
+        return
+    if join_access_enabled and not check_channel_membership(user_id):
+        prompt_join_channels(chat_id, user_id,
+                             "retry_browse" if kind == "browse" else f"retry_find_{query}")
+        return
+    if kind == "browse":
+        results = render_browse_listing(int(page))
+    else:
+        results = render_search_results(query, int(page))
+    if results is None:
+        return
 
-        videos = db.get_all_videos()
-        if not videos:
-            bot.edit_message_text("📪 No videos available to delete\\.",
-                                  chat_id,
-                                  call.message.message_id,
-                                  parse_mode='MarkdownV2')
-            return
+    text, keyboard = results
+    bot.edit_message_text(text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=keyboard,
+                          parse_mode='MarkdownV2')
 
-        # Create confirmation keyboard with all videos
-        keyboard = types.InlineKeyboardMarkup()
-        confirmation_text = f"🗑️ **Bulk Delete Videos**\n\n⚠️ **WARNING:** This will permanently delete ALL {len(videos)} videos\\!\n\nAre you sure you want to proceed\\?"
 
-        keyboard.add(
-            types.InlineKeyboardButton(
-                "✅ Yes, Delete ALL", callback_data="confirm_bulk_delete_all"),
-            types.InlineKeyboardButton("❌ Cancel", callback_data="admin_bulk"))
+def handle_bulk_delete_videos_callback(call, user_id, chat_id):
+    """Ask an admin to confirm deleting every video"""
+    # handle_callback already answered the query, so non-admins are just ignored
+    if user_id not in ADMIN_IDS:
+        return
 
-        bot.edit_message_text(confirmation_text,
+    video_count = db.get_video_count()
+    if not video_count:
+        bot.edit_message_text("📪 No videos available to delete\\.",
                               chat_id,
                               call.message.message_id,
-                              reply_markup=keyboard,
                               parse_mode='MarkdownV2')
+        return
 
-    elif data == "confirm_bulk_delete_all":
-        # Check admin access again for security
-        if user_id not in ADMINS and user_id != OWNER:
-            bot.answer_callback_query(call.id,
-                                      "❌ Admin access required",
-                                      show_alert=True)
-            return
+    confirmation_text = f"🗑️ **Bulk Delete Videos**\n\n⚠️ **WARNING:** This will permanently delete ALL {video_count} videos\\!\n\nAre you sure you want to proceed\\?"
 
-        # Delete all videos
-        videos = db.get_all_videos()
-        deleted_count = 0
+    bot.edit_message_text(confirmation_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=CONFIRM_BULK_DELETE_KEYBOARD,
+                          parse_mode='MarkdownV2')
 
-        for video in videos:
-            if db.delete_video(video['id']):
-                deleted_count += 1
 
-        # Log the bulk delete action
-        db.log_user_activity(user_id, "bulk_delete_videos",
-                             f"Bulk deleted {deleted_count} videos")
+def handle_confirm_bulk_delete_callback(call, user_id, chat_id):
+    """Delete every video after an admin confirmed"""
+    # Check admin access again for security
+    if user_id not in ADMIN_IDS:
+        return
 
-        success_text = f"✅ **Bulk Delete Completed**\n\nSuccessfully deleted {deleted_count} videos\\."
+    # Delete all videos in one statement
+    deleted_count = db.clear_all_videos()
 
-        # Return to admin panel
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("⬅️ Back to Admin Panel",
-                                       callback_data="admin_panel_main"))
+    # Log the bulk delete action
+    db.log_user_activity(user_id, "bulk_delete_videos",
+                         f"Bulk deleted {deleted_count} videos")
 
-        bot.edit_message_text(success_text,
-                              chat_id,
-                              call.message.message_id,
-                              reply_markup=keyboard,
-                              parse_mode='MarkdownV2')
+    success_text = f"✅ **Bulk Delete Completed**\n\nSuccessfully deleted {deleted_count} videos\\."
 
-    elif data.startswith("retry_"):
-        original_command_data = data.split("_", 1)[1]
-        if not check_channel_membership(user_id):
-            prompt_join_channels(chat_id, user_id, data)
-            return
+    bot.edit_message_text(success_text,
+                          chat_id,
+                          call.message.message_id,
+                          reply_markup=BACK_TO_ADMIN_PANEL_KEYBOARD,
+                          parse_mode='MarkdownV2')
 
-        if original_command_data.startswith("start_"):
-            video_id = original_command_data.split("_")[1]
-            video = db.get_video_by_id(video_id)
-            if video:
-                caption_text = f"🎥 *{escape_markdown_v2(video['name'])}*\n\n{escape_markdown_v2(video['description'])}"
-                sent_message = bot.send_video(chat_id,
-                                              video['file_id'],
-                                              caption=caption_text,
-                                              supports_streaming=True,
-                                              parse_mode='MarkdownV2')
-                threading.Thread(target=delete_video_message,
-                                 args=(chat_id,
-                                       sent_message.message_id)).start()
-            else:
-                bot.send_message(
-                    chat_id,
-                    "❌ Video not found\\. Please check the ID and try again\\.",
-                    parse_mode='MarkdownV2')
-
-        elif original_command_data == "browse":
-            videos = db.get_all_videos()
-            if not videos:
-                bot.send_message(chat_id,
-                                 "📪 No videos available\\.",
-                                 parse_mode='MarkdownV2')
-                return
-            keyboard = types.InlineKeyboardMarkup(row_width=2)
-            for video in videos[:20]:
-                keyboard.add(
-                    types.InlineKeyboardButton(
-                        video['name'], callback_data=f"video_{video['id']}"))
-            bot.send_message(
-                chat_id,
-                f"📹 Available videos \\({len(videos)} total\\)\\:",
-                reply_markup=keyboard,
-                parse_mode='MarkdownV2')
 
-        elif original_command_data == "random":
-            video = db.get_random_video()
-            if video:
-                caption_text = f"🎲 Random video: {escape_markdown_v2(video['name'])}\n\n{escape_markdown_v2(video['description'])}"
-                sent_message = bot.send_video(chat_id,
-                                              video['file_id'],
-                                              caption=caption_text,
-                                              supports_streaming=True,
-                                              parse_mode='MarkdownV2')
-                threading.Thread(target=delete_video_message,
-                                 args=(chat_id,
-                                       sent_message.message_id)).start()
-            else:
-                bot.send_message(chat_id,
-                                 "📪 No videos available\\.",
-                                 parse_mode='MarkdownV2')
-
-        elif original_command_data.startswith("find_"):
-            query = original_command_data.split("_", 1)[1]
-            videos = db.search_videos(query)
-            count = len(videos)
-            if not videos:
-                bot.send_message(chat_id,
-                                 "❌ No videos found matching your query\\.",
-                                 parse_mode='MarkdownV2')
-                return
-
-            response_text = f"🔍 Found {count} results for '`{escape_markdown_v2(query)}`'\\:"
-
-            keyboard = types.InlineKeyboardMarkup(row_width=2)
-            for video in videos[:20]:
-                keyboard.add(
-                    types.InlineKeyboardButton(
-                        video['name'], callback_data=f"video_{video['id']}"))
-            bot.send_message(chat_id,
-                             response_text,
-                             reply_markup=keyboard,
-                             parse_mode='MarkdownV2')
+def retry_start(chat_id, user_id, video_id):
+    """Send the video a deep link or video button pointed at"""
+    video = db.get_video_by_id(video_id)
+    if video:
+        # Log video view for analytics
+        db.log_video_view(video_id, user_id)
+
+        caption_text = video_caption(video['name'], video['description'])
+        send_auto_delete_video(chat_id, video['file_id'], caption_text)
+    else:
+        bot.send_message(
+            chat_id,
+            "❌ Video not found\\. Please check the ID and try again\\.",
+            parse_mode='MarkdownV2')
+
+
+def retry_browse(chat_id, user_id, _=None):
+    """Send the browse listing"""
+    listing = render_browse_listing()
+    if listing is None:
+        bot.send_message(chat_id,
+                         "📪 No videos available\\.",
+                         parse_mode='MarkdownV2')
+        return
+    text, keyboard = listing
+    bot.send_message(chat_id,
+                     text,
+                     reply_markup=keyboard,
+                     parse_mode='MarkdownV2')
+
+
+def retry_random(chat_id, user_id, _=None):
+    """Send a random video"""
+    video = db.get_random_video()
+    if video:
+        # Log video view for analytics
+        db.log_video_view(video['id'], user_id)
+
+        caption_text = video_caption(video['name'], video['description'], random_pick=True)
+        send_auto_delete_video(chat_id, video['file_id'], caption_text)
+    else:
+        bot.send_message(chat_id,
+                         "📪 No videos available\\.",
+                         parse_mode='MarkdownV2')
+
+
+def retry_find(chat_id, user_id, query):
+    """Send the search results for query"""
+    results = render_search_results(query)
+    if results is None:
+        bot.send_message(chat_id,
+                         "❌ No videos found matching your query\\.",
+                         parse_mode='MarkdownV2')
+        return
+
+    response_text, keyboard = results
+    bot.send_message(chat_id,
+                     response_text,
+                     reply_markup=keyboard,
+                     parse_mode='MarkdownV2')
+
+
+# retry_<command> payloads: whole commands first, then <command>_<argument> by prefix
+RETRY_HANDLERS = {
+    'browse': retry_browse,
+    'random': retry_random,
+}
+RETRY_PREFIX_HANDLERS = {
+    'start': retry_start,
+    'find': retry_find,
+}
+
+
+def handle_retry_callback(call, user_id, chat_id):
+    """Re-run a command once the user has joined the required channels"""
+    data = call.data
+    original_command_data = data.partition("_")[2]
+    # The user says they just joined, so don't trust a cached "not a member"
+    forget_channel_membership(user_id)
+    if not check_channel_membership(user_id):
+        prompt_join_channels(chat_id, user_id, data)
+        return
+
+    handler = RETRY_HANDLERS.get(original_command_data)
+    argument = None
+    if handler is None:
+        command, separator, argument = original_command_data.partition("_")
+        handler = separator and RETRY_PREFIX_HANDLERS.get(command)
+    if handler:
+        handler(chat_id, user_id, argument)
+
+
+# Catch-all callbacks: exact callback_data first, then by the prefix before the
+# first underscore (video_<id>, retry_<command>, browse_p<page>, find_p<page>_<query>),
+# each a single dict lookup
+CALLBACK_HANDLERS = {
+    'bulk_delete_videos': handle_bulk_delete_videos_callback,
+    'confirm_bulk_delete_all': handle_confirm_bulk_delete_callback,
+}
+CALLBACK_PREFIX_HANDLERS = {
+    'video': handle_video_callback,
+    'retry': handle_retry_callback,
+    'browse': handle_results_page_callback,
+    'find': handle_results_page_callback,
+}
+
+
+@bot.callback_query_handler(func=lambda call: True)
+def handle_callback(call):
+    """Handle button clicks"""
+    if not first_delivery(call):
+        return
+    user_id = call.from_user.id
+    chat_id = call.message.chat.id
+    data = call.data
+    username = call.from_user.username
+    first_name = call.from_user.first_name
+
+    # Check if user is banned
+    if not check_user_access(user_id, username, first_name,
+                             f"callback:{data}"):
+        bot.answer_callback_query(call.id,
+                                  "❌ You are banned from using this bot",
+                                  show_alert=True)
+        return
+
+    bot.answer_callback_query(call.id)  # Acknowledge the button press
+
+    handler = CALLBACK_HANDLERS.get(data)
+    if handler is None:
+        prefix, separator, _ = data.partition("_")
+        handler = separator and CALLBACK_PREFIX_HANDLERS.get(prefix)
+    if handler:
+        handler(call, user_id, chat_id)
 
 
 def start_bot_services():
     """Start all bot services (Flask, scheduler, ping)"""
-    global bot_info_cache
-    
-    print("🤖 Enhanced Video Bot starting...")
-    print(f"👑 Owner User ID: {OWNER}")
-    print(f"👮 Admins: {ADMINS}")
-    print(f"📢 Channels: {CHANNEL_1}, {CHANNEL_2}")
+    logger.info("🤖 Enhanced Video Bot starting...")
+    logger.info(f"👑 Owner User ID: {OWNER}")
+    logger.info(f"👮 Admins: {ADMINS}")
+    logger.info(f"📢 Channels: {CHANNEL_1}, {CHANNEL_2}")
     
-    # Test bot connection and cache info
-    bot_info = bot.get_me()
-    bot_info_cache = {'username': bot_info.username}
-    print(f"✅ Bot connected successfully: @{bot_info.username}")
+    # Cache bot info before anything serves /health; a saved copy skips the blocking
+    # get_me() and is refreshed in the background instead
+    if load_bot_info():
+        run_in_background(refresh_bot_info)
+    logger.info(f"✅ Bot connected successfully: @{get_bot_username()}")
 
     # Start scheduled broadcast processor in background
     scheduler_thread = threading.Thread(
         target=process_scheduled_broadcasts, daemon=True)
     scheduler_thread.start()
-    print("⏰ Scheduled broadcast processor started")
+    logger.info("⏰ Scheduled broadcast processor started")
+
+    # Start the single timer thread for video deletions and keep-alive pings
+    timer_thread = threading.Thread(target=process_timer_jobs, daemon=True)
+    timer_thread.start()
+    logger.info("⏲️ Timer worker started")
 
     # Start keep-alive ping for Render free tier (only if URL is set)
-    render_url = os.getenv('RENDER_EXTERNAL_URL')
-    if render_url:
-        ping_thread = threading.Thread(target=keep_alive_ping, daemon=True)
-        ping_thread.start()
-        print("🔄 Keep-alive ping started")
+    if RENDER_EXTERNAL_URL:
+        start_keep_alive(RENDER_EXTERNAL_URL)
+        logger.info("🔄 Keep-alive ping started")
     else:
-        print("⚠️ RENDER_EXTERNAL_URL not set - keep-alive ping disabled")
+        logger.warning("⚠️ RENDER_EXTERNAL_URL not set - keep-alive ping disabled")
 
     # Start Flask web server in background (for health checks)
-    port = int(os.getenv('PORT', 5000))  # Render will override with PORT env var
     def run_flask():
-        app.run(host='0.0.0.0', port=port, debug=False)
+        if WAITRESS_AVAILABLE:
+            # Production WSGI server so concurrent health pings don't queue behind each other
+            serve(app, host='0.0.0.0', port=PORT, threads=4, connection_limit=200)
+        else:
+            app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
     
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
-    print(f"🌐 Web server started on port {port}")
+    logger.info(f"🌐 Web server started on port {PORT}")
+
+
+def start_webhook():
+    """Point Telegram at WEBHOOK_PATH and serve updates from the Flask app until shutdown"""
+    # Updates queued while the bot was down are kept and delivered once the webhook is set
+    attempt = 0
+    while True:
+        try:
+            bot.set_webhook(url=f"{RENDER_EXTERNAL_URL}{WEBHOOK_PATH}",
+                            allowed_updates=ALLOWED_UPDATES,
+                            secret_token=WEBHOOK_SECRET)
+            break
+        except (ApiTelegramException, requests.exceptions.RequestException) as e:
+            attempt += 1
+            wait_time = backoff_delay(attempt, 5, 180)
+            logger.warning(f"⚠️ Setting webhook failed: {e}; retrying in {wait_time:.1f} seconds")
+            time.sleep(wait_time)
+    logger.info(f"🪝 Webhook set to {RENDER_EXTERNAL_URL}/webhook/...")
+    while True:
+        time.sleep(3600)
+
+
+# Polling errors worth a backoff-and-retry: HTTP codes first (409 is a competing
+# getUpdates), then descriptions for the 400s that only differ by message
+RETRYABLE_API_ERROR_CODES = frozenset({409, 429, 502, 503, 504})
+RETRYABLE_API_ERROR_PHRASES = (
+    "query is too old",
+    "response timeout expired",
+    "query id is invalid",
+    "network error",
+    "connection error",
+)
+
+
+def is_retryable_api_error(e):
+    """Whether a polling ApiTelegramException is transient enough to retry with backoff"""
+    if e.error_code in RETRYABLE_API_ERROR_CODES:
+        return True
+    description = (e.description or str(e)).lower()
+    return any(phrase in description for phrase in RETRYABLE_API_ERROR_PHRASES)
+
+
+def backoff_delay(attempt, base, cap, floor=0.5):
+    """Full-jitter exponential backoff: uniform in [floor, min(base * 2**attempt, cap)]"""
+    return max(floor, random.uniform(0, min(base * 2 ** attempt, cap)))
 
 
 def start_bot_with_retry():
     """Start bot with automatic restart on API timeout errors"""
     max_retries = 5
     retry_count = 0
+    # Drop the backlog queued while the bot was down, but not on in-process restarts
+    skip_pending = True
     
     while True:
         try:
-            print(f"🔄 Starting bot polling (attempt {retry_count + 1})")
-            bot.polling(none_stop=True, timeout=60, long_polling_timeout=60)
+            logger.info(f"🔄 Starting bot polling (attempt {retry_count + 1})")
+            # getUpdates is refused while a webhook from an earlier webhook-mode run is still set
+            bot.remove_webhook()
+            # Telegram holds getUpdates for at most ~50s; the HTTP timeouts stay above
+            # that so an idle long poll returns empty instead of timing out client-side
+            bot.polling(none_stop=True, timeout=70, long_polling_timeout=50,
+                        skip_pending=skip_pending, allowed_updates=ALLOWED_UPDATES)
         except ApiTelegramException as e:
-            error_msg = str(e).lower()
-            print(f"❌ Telegram API Error: {e}")
+            logger.error(f"❌ Telegram API Error: {e}")
             
             # Handle specific timeout errors that should trigger restart
-            if any(phrase in error_msg for phrase in [
-                "query is too old", 
-                "response timeout expired", 
-                "query id is invalid",
-                "conflict: terminated by other getupdates request",
-                "network error",
-                "connection error"
-            ]):
+            if is_retryable_api_error(e):
                 retry_count += 1
                 if retry_count <= max_retries:
-                    wait_time = min(30 * retry_count, 300)  # Progressive backoff, max 5 minutes
-                    print(f"🔄 Retrying in {wait_time} seconds (attempt {retry_count}/{max_retries})")
+                    # Jittered so instances restarting together don't retry in lockstep
+                    wait_time = backoff_delay(retry_count, 15, 300)
+                    logger.info(f"🔄 Retrying in {wait_time:.1f} seconds (attempt {retry_count}/{max_retries})")
                     time.sleep(wait_time)
                     continue
                 else:
-                    print(f"❌ Max retries ({max_retries}) exceeded. Restarting with fresh connection...")
+                    logger.error(f"❌ Max retries ({max_retries}) exceeded. Restarting with fresh connection...")
                     retry_count = 0  # Reset counter for fresh start
                     time.sleep(60)  # Wait 1 minute before fresh restart
                     continue
             else:
                 # For other API errors, wait and retry
-                print(f"⚠️ Unhandled API error, waiting 30 seconds before retry...")
+                logger.warning(f"⚠️ Unhandled API error, waiting 30 seconds before retry...")
                 time.sleep(30)
                 continue
                 
         except requests.exceptions.RequestException as e:
-            print(f"🌐 Network/Request Error: {e}")
+            logger.warning(f"🌐 Network/Request Error: {e}")
             retry_count += 1
             if retry_count <= max_retries:
-                wait_time = min(15 * retry_count, 180)  # Progressive backoff, max 3 minutes  
-                print(f"🔄 Network retry in {wait_time} seconds (attempt {retry_count}/{max_retries})")
+                wait_time = backoff_delay(retry_count, 5, 180)
+                logger.info(f"🔄 Network retry in {wait_time:.1f} seconds (attempt {retry_count}/{max_retries})")
                 time.sleep(wait_time)
                 continue
             else:
-                print(f"❌ Max network retries exceeded. Restarting...")
+                logger.error(f"❌ Max network retries exceeded. Restarting...")
                 retry_count = 0
                 time.sleep(30)
                 continue
                 
         except Exception as e:
-            print(f"💥 Unexpected Error: {e}")
-            print(f"🔄 Restarting in 10 seconds...")
+            logger.error(f"💥 Unexpected Error: {e}")
+            logger.info(f"🔄 Restarting in 10 seconds...")
             time.sleep(10)
             retry_count = 0  # Reset for unexpected errors
             continue
+        finally:
+            skip_pending = False
             
         # If we get here, polling stopped normally (should not happen with none_stop=True)
-        print("⚠️ Polling stopped unexpectedly, restarting...")
+        logger.warning("⚠️ Polling stopped unexpectedly, restarting...")
         time.sleep(5)
 
 
@@ -2547,12 +2950,15 @@ if __name__ == "__main__":
         # Initialize services once
         start_bot_services()
         
-        # Start bot with automatic retry/restart logic
-        start_bot_with_retry()
+        if USE_WEBHOOK:
+            start_webhook()
+        else:
+            # Start bot with automatic retry/restart logic
+            start_bot_with_retry()
         
     except KeyboardInterrupt:
-        print("\n👋 Bot shutdown requested by user")
+        logger.info("👋 Bot shutdown requested by user")
     except Exception as e:
-        print(f"💥 Fatal error in main: {e}")
-        print("🔄 Attempting restart in 30 seconds...")
+        logger.error(f"💥 Fatal error in main: {e}")
+        logger.info("🔄 Attempting restart in 30 seconds...")
         time.sleep(30)
@@ -0,0 +1,27 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a token is available"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take one token, waiting as long as needed for the bucket to refill"""
+        with self._cond:
+            self._refill()
+            while self._tokens < 1:
+                self._cond.wait((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1